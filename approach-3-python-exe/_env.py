@@ -0,0 +1,17 @@
+"""env 檔（env.local / .env）解析。只依賴標準函式庫，可在無頭環境單獨測試。"""
+import re
+
+# 只用 [ \t]：MULTILINE 下 \s 會跨行，空值（如 `KEY=`）會把下一行吞成值
+_ENV_LINE = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.MULTILINE
+)
+
+
+def parse_env(text: str) -> dict[str, str]:
+    """單次 regex 掃描 env 檔（忽略註解行，去除成對引號）"""
+    values = {}
+    for key, value in _ENV_LINE.findall(text):
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        values[key] = value
+    return values
@@ -0,0 +1,114 @@
+"""後處理：config regex_rules 的編譯與套用。
+
+只依賴標準函式庫（不匯入 GUI / 音訊套件），可在無頭環境單獨測試。
+"""
+import functools
+import re
+
+
+def _fuse_rules(run: list[tuple[re.Pattern, str]]) -> tuple[re.Pattern, object]:
+    """把多條簡單規則合併成一個具名群組 alternation，文字只需掃描一次"""
+    parts = []
+    replacements = {}
+    for i, (pattern, replacement) in enumerate(run):
+        scope = "i" if pattern.flags & re.IGNORECASE else ""
+        parts.append(f"(?P<g{i}>(?{scope}:{pattern.pattern}))")
+        replacements[f"g{i}"] = replacement
+    fused = re.compile("|".join(parts))
+    return fused, lambda m: replacements[m.lastgroup]
+
+
+_REGEX_META = set(".^$*+?{}[]\\()")
+
+
+def _rule_literals(pattern: re.Pattern) -> tuple[str, ...] | None:
+    """pattern 為純字面選擇式（如 "N8n|N 8 n"）時回傳 casefold 後各字面，否則 None"""
+    literals = pattern.pattern.split("|")
+    if any(not lit or _REGEX_META.intersection(lit) for lit in literals):
+        return None
+    return tuple(lit.casefold() for lit in literals)
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """a、b 互為子字串，或 a 的結尾與 b 的開頭（反之亦然）可接成同一段文字"""
+    if a in b or b in a:
+        return True
+    return any(a.endswith(b[:k]) for k in range(1, len(b))) or \
+        any(b.endswith(a[:k]) for k in range(1, len(a)))
+
+
+def _rules_conflict(x: tuple[tuple[str, ...], str], y: tuple[tuple[str, ...], str]) -> bool:
+    """兩條字面規則合併掃描是否可能與依序套用結果不同：
+    字面彼此重疊（最長 / 先出現者會搶走另一條的命中），或一條的字面可能命中
+    另一條的替換結果（依序套用時後者看得到前者的輸出），或替換為空（刪除後兩側可接成新命中）"""
+    (lits_x, repl_x), (lits_y, repl_y) = x, y
+    if not repl_x or not repl_y:
+        return True
+    repl_x, repl_y = repl_x.casefold(), repl_y.casefold()
+    return (
+        any(_overlaps(a, b) for a in lits_x for b in lits_y)
+        or any(_overlaps(a, repl_y) for a in lits_x)
+        or any(_overlaps(b, repl_x) for b in lits_y)
+    )
+
+
+def compile_rules(regex_rules: list[dict]) -> list[tuple[re.Pattern, object]]:
+    """將 config 的 regex_rules 編譯為 (Pattern, replacement) 清單。
+
+    連續的純字面規則（如 "N8n|N 8 n"）在彼此不重疊、也不會命中對方替換結果時，
+    合併為單一 alternation 一次掃描，結果與依序套用相同；
+    其餘規則（含 regex 語法、可能互相影響者）維持原順序逐條套用。
+    """
+    compiled = []
+    for rule in regex_rules:
+        flags = 0
+        flag_str = rule.get("flags", "")
+        if "IGNORECASE" in flag_str.upper():
+            flags |= re.IGNORECASE
+        compiled.append((re.compile(rule["pattern"], flags), rule["replacement"]))
+
+    result = []
+    run: list[tuple[re.Pattern, str]] = []
+    run_keys: list[tuple[tuple[str, ...], str]] = []
+
+    def _flush():
+        if len(run) > 1:
+            result.append(_fuse_rules(run))
+        else:
+            result.extend(run)
+        run.clear()
+        run_keys.clear()
+
+    for pattern, replacement in compiled:
+        literals = _rule_literals(pattern)
+        if literals is None or "\\" in replacement:
+            _flush()
+            result.append((pattern, replacement))
+            continue
+        key = (literals, replacement)
+        if any(_rules_conflict(key, other) for other in run_keys):
+            _flush()
+        run.append((pattern, replacement))
+        run_keys.append(key)
+    _flush()
+    return result
+
+
+def apply_corrections(text: str, compiled_rules: list[tuple[re.Pattern, object]]) -> str:
+    if not text:
+        return ""
+    if not compiled_rules:
+        return text.strip()
+    for pattern, replacement in compiled_rules:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def make_corrector(compiled_rules: list[tuple[re.Pattern, object]]):
+    """依規則數量回傳特化的校正函式：0 條只 strip、1 條（預設設定）直接綁定 sub，其餘走通用迴圈"""
+    if not compiled_rules:
+        return str.strip
+    if len(compiled_rules) == 1:
+        sub, replacement = compiled_rules[0][0].sub, compiled_rules[0][1]
+        return lambda text: sub(replacement, text).strip()
+    return functools.partial(apply_corrections, compiled_rules=compiled_rules)
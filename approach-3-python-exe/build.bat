@@ -15,7 +15,7 @@ echo.
 ::   --add-data    將 config.json 一併打包
 ::   --upx-dir     如果安裝了 UPX 可提供路徑以壓縮 exe（可選）
 ::
-:: 注意：pystray 和 Pillow 已在 requirements.txt 中，必須先安裝
+:: 注意：pystray、Pillow、scipy（重取樣）已在 requirements.txt 中，必須先安裝
 
 pyinstaller ^
     --onefile ^
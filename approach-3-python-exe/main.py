@@ -18,20 +18,40 @@ Windows 語音轉文字工具 — 方案三：Python 可打包 .exe 版本
   程式啟動時自動檢查是否已有實例執行，若已有則彈出提示並退出。
 """
 
+import ctypes
+import functools
+import io
 import json
+import math
 import os
+import queue
 import re
+import struct
+import subprocess
 import sys
-import tempfile
 import threading
 import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from ctypes import wintypes
 from pathlib import Path
 
 import numpy as np
+import orjson
 import pyperclip
+import pystray
 import requests
 import sounddevice as sd
 import soundfile as sf
+from PIL import Image, ImageDraw
+from pynput import keyboard
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from scipy.signal import resample_poly
+from urllib3.util.retry import Retry
+
+from _env import parse_env
+from _postprocess import compile_rules, make_corrector
 
 
 # ---------------------------------------------------------------------------
@@ -52,7 +72,6 @@ def ensure_single_instance(app_name: str = "WhisperVoiceTyping") -> bool:
     if sys.platform != "win32":
         return True
 
-    import ctypes
     mutex_name = f"Global\\{app_name}_SingleInstance"
     handle = ctypes.windll.kernel32.CreateMutexW(None, True, mutex_name)
     last_error = ctypes.windll.kernel32.GetLastError()
@@ -95,7 +114,6 @@ _TRAY_TOOLTIPS = {
 
 def _make_icon_image(color: str, size: int = 64):
     """用 PIL 動態建立純色圓形麥克風圖示（不需 .ico 檔案）"""
-    from PIL import Image, ImageDraw
     img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     draw.ellipse([2, 2, size - 2, size - 2], fill=color)           # 底圓
@@ -107,16 +125,22 @@ def _make_icon_image(color: str, size: int = 64):
 
 
 class TrayIcon:
-    """系統匣圖示管理"""
+    """系統匣圖示管理。
+
+    圖示重繪（PIL 繪圖 + 系統匣 API）交給專屬執行緒，set_state() 只記下目標狀態即返回，
+    不佔用開始錄音、上傳、貼上等關鍵路徑。
+    """
 
     def __init__(self, hotkey: str = "F9"):
-        self._state = TRAY_IDLE
+        self._state = TRAY_IDLE      # 已顯示的狀態
+        self._pending = TRAY_IDLE    # 最新要求的狀態
         self._hotkey = hotkey.upper()
         self._icon = None
+        self._icons: dict = {}       # 狀態 → 預先繪好的圖示（只有四種，啟動時畫一次）
         self._lock = threading.Lock()
+        self._dirty = threading.Event()
 
     def _build_menu(self):
-        import pystray
         return pystray.Menu(
             pystray.MenuItem("Whisper 語音轉文字", None, enabled=False),
             pystray.MenuItem(f"熱鍵：按住 {self._hotkey} 說話", None, enabled=False),
@@ -126,30 +150,46 @@ class TrayIcon:
 
     def start(self):
         """在 daemon 執行緒中啟動系統匣（不阻塞主流程）"""
-        import pystray
-        img = _make_icon_image(_TRAY_COLORS[TRAY_IDLE])
+        self._icons = {state: _make_icon_image(color) for state, color in _TRAY_COLORS.items()}
         self._icon = pystray.Icon(
             name="WhisperVoiceTyping",
-            icon=img,
+            icon=self._icons[TRAY_IDLE],
             title=_TRAY_TOOLTIPS[TRAY_IDLE],
             menu=self._build_menu(),
         )
         threading.Thread(target=self._icon.run, daemon=True).start()
+        threading.Thread(target=self._render_loop, daemon=True).start()
 
     def set_state(self, state: str):
-        """更新圖示顏色與 tooltip"""
+        """要求更新圖示顏色與 tooltip（非阻塞）"""
         with self._lock:
-            if self._state == state or self._icon is None:
-                return
+            self._pending = state
+        self._dirty.set()
+
+    def _render_loop(self):
+        """只套用最新狀態；連續多次 set_state 只重繪最後一次"""
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            with self._lock:
+                state = self._pending
+            if state == self._state:
+                continue
             self._state = state
-        self._icon.icon = _make_icon_image(_TRAY_COLORS.get(state, _TRAY_COLORS[TRAY_IDLE]))
-        self._icon.title = _TRAY_TOOLTIPS.get(state, "Whisper 語音轉文字")
+            # 每次賦值都是一次 Shell_NotifyIcon(NIM_MODIFY)；只送真正改變的部分
+            icon = self._icons.get(state, self._icons[TRAY_IDLE])
+            title = _TRAY_TOOLTIPS.get(state, "Whisper 語音轉文字")
+            if self._icon.icon is not icon:
+                self._icon.icon = icon
+            if self._icon.title != title:
+                self._icon.title = title
 
 
 # ---------------------------------------------------------------------------
 # 設定
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=1)
 def get_base_dir() -> Path:
     """取得程式所在目錄（支援 PyInstaller 打包後的路徑）"""
     if getattr(sys, "frozen", False):
@@ -158,6 +198,21 @@ def get_base_dir() -> Path:
     return Path(__file__).parent
 
 
+@functools.lru_cache(maxsize=None)
+def _dir_names(directory: Path) -> frozenset[str]:
+    """一次 scandir 取得目錄內所有名稱，取代對每個候選檔逐一 stat"""
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(entry.name for entry in it)
+    except OSError:
+        return frozenset()
+
+
+def _first_existing(paths) -> Path | None:
+    """依序找第一個存在的檔案；同一目錄只列舉一次"""
+    return next((p for p in paths if p.name in _dir_names(p.parent)), None)
+
+
 def load_config() -> dict:
     """從 config.json 載入設定"""
     config = {
@@ -166,9 +221,18 @@ def load_config() -> dict:
         "language": "zh",
         "temperature": 0.0,
         "response_format": "json",
+        "stream_upload": False,
+        "cancel_on_repress": False,
         "sample_rate": 16000,
         "channels": 1,
+        "keep_stream_open": False,  # 常駐會讓麥克風指示燈常亮、藍牙耳機卡在 HFP，需明確開啟
+        "upload_format": "flac",
+        "silence_peak": 300,
+        "silence_rms": 100,
+        "coalesce_seconds": 1.0,
+        "trim_silence": True,
         "hotkey": "f9",
+        "paste_method": "clipboard",
         "prompt": "請使用繁體中文。包含：蕭淳云, 周芷萓, 合作廠商加模, 專案 Tahoe, n8n, Zeabur。",
         "regex_rules": [
             {"pattern": r"N8n|N 8 n", "replacement": "n8n", "flags": "IGNORECASE"}
@@ -182,25 +246,42 @@ def load_config() -> dict:
         Path.home() / ".whisper-voice-typing" / "config.json",
     ]
 
-    for cp in config_paths:
-        if cp.exists():
-            with open(cp, encoding="utf-8") as f:
-                user_cfg = json.load(f)
-            if "api" in user_cfg:
-                config["api_key"] = user_cfg["api"].get("openai_api_key", config["api_key"])
-                config["model"] = user_cfg["api"].get("model", config["model"])
-                config["language"] = user_cfg["api"].get("language", config["language"])
-                config["temperature"] = user_cfg["api"].get("temperature", config["temperature"])
-            if "recording" in user_cfg:
-                config["sample_rate"] = user_cfg["recording"].get("sample_rate", config["sample_rate"])
-                config["channels"] = user_cfg["recording"].get("channels", config["channels"])
-            if "prompt" in user_cfg:
-                config["prompt"] = user_cfg["prompt"].get("text", config["prompt"])
-            if "hotkey" in user_cfg:
-                config["hotkey"] = user_cfg["hotkey"].get("record_key", config["hotkey"]).lower()
-            if "post_process" in user_cfg:
-                config["regex_rules"] = user_cfg["post_process"].get("regex_rules", config["regex_rules"])
-            break
+    cp = _first_existing(config_paths)
+    if cp:
+        with open(cp, encoding="utf-8") as f:
+            user_cfg = json.load(f)
+        if "api" in user_cfg:
+            config["api_key"] = user_cfg["api"].get("openai_api_key", config["api_key"])
+            config["model"] = user_cfg["api"].get("model", config["model"])
+            config["language"] = user_cfg["api"].get("language", config["language"])
+            config["temperature"] = user_cfg["api"].get("temperature", config["temperature"])
+            config["stream_upload"] = bool(user_cfg["api"].get("stream_upload", config["stream_upload"]))
+            config["cancel_on_repress"] = bool(
+                user_cfg["api"].get("cancel_on_repress", config["cancel_on_repress"])
+            )
+        if "recording" in user_cfg:
+            config["sample_rate"] = user_cfg["recording"].get("sample_rate", config["sample_rate"])
+            config["channels"] = user_cfg["recording"].get("channels", config["channels"])
+            config["keep_stream_open"] = bool(
+                user_cfg["recording"].get("keep_stream_open", config["keep_stream_open"])
+            )
+            config["upload_format"] = user_cfg["recording"].get(
+                "upload_format", config["upload_format"]
+            ).lower()
+            config["silence_peak"] = user_cfg["recording"].get("silence_peak", config["silence_peak"])
+            config["silence_rms"] = user_cfg["recording"].get("silence_rms", config["silence_rms"])
+            config["coalesce_seconds"] = user_cfg["recording"].get(
+                "coalesce_seconds", config["coalesce_seconds"]
+            )
+            config["trim_silence"] = bool(user_cfg["recording"].get("trim_silence", config["trim_silence"]))
+        if "prompt" in user_cfg:
+            config["prompt"] = user_cfg["prompt"].get("text", config["prompt"])
+        if "hotkey" in user_cfg:
+            config["hotkey"] = user_cfg["hotkey"].get("record_key", config["hotkey"]).lower()
+        if "paste" in user_cfg:
+            config["paste_method"] = user_cfg["paste"].get("method", config["paste_method"]).lower()
+        if "post_process" in user_cfg:
+            config["regex_rules"] = user_cfg["post_process"].get("regex_rules", config["regex_rules"])
 
     # env.local / .env.local 覆蓋（開發用）
     env_candidates = [
@@ -209,19 +290,17 @@ def load_config() -> dict:
         base.parent / "env.local",
         base.parent / ".env.local",
     ]
-    for env_file in env_candidates:
-        if env_file.exists():
-            with open(env_file, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, _, value = line.partition("=")
-                        os.environ.setdefault(key.strip(), value.strip())
-            break
+    env_file = _first_existing(env_candidates)
+    if env_file:
+        for key, value in parse_env(env_file.read_text(encoding="utf-8")).items():
+            os.environ.setdefault(key, value)
 
     # 環境變數最優先
     config["api_key"] = os.environ.get("OPENAI_API_KEY", config["api_key"])
 
+    # regex 規則於載入時一次編譯，熱路徑不再解析 flags
+    config["_apply"] = make_corrector(compile_rules(config["regex_rules"]))
+
     return config
 
 
@@ -229,103 +308,409 @@ def load_config() -> dict:
 # 錄音模組
 # ---------------------------------------------------------------------------
 
+# 上傳格式：format, subtype, 檔名, MIME。Whisper API 皆可接受；
+# FLAC 無損約省一半流量，Opus 對語音約小 10 倍（需 libsndfile >= 1.0.29）
+_UPLOAD_FORMATS = {
+    "wav":  ("WAV", "PCM_16", "voice.wav", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "voice.flac", "audio/flac"),
+    "opus": ("OGG", "OPUS", "voice.ogg", "audio/ogg"),
+}
+
+
+def _native_input_rate(fallback: int) -> int:
+    """查詢預設輸入裝置的原生取樣率；查不到則沿用 fallback"""
+    try:
+        return int(sd.query_devices(kind="input")["default_samplerate"])
+    except Exception:
+        return fallback
+
+
+def _resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """int16 (frames, channels) 重取樣：scipy polyphase（內建抗混疊低通），44.1 / 48 kHz 皆適用"""
+    if src_rate == dst_rate or not len(audio):
+        return audio
+    g = math.gcd(src_rate, dst_rate)
+    out = resample_poly(audio, dst_rate // g, src_rate // g, axis=0)
+    return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+def _trim_silence(audio: np.ndarray, rate: int, peak_threshold: int, pad_seconds: float = 0.1) -> np.ndarray:
+    """以 10 ms 為單位找出第一個 / 最後一個 peak 達門檻的區塊，裁掉前後靜音（各保留 pad_seconds）"""
+    frame = max(rate // 100, 1)
+    n_frames = len(audio) // frame
+    if peak_threshold <= 0 or not n_frames:
+        return audio
+    peaks = np.abs(audio[:n_frames * frame].astype(np.int32)).reshape(n_frames, -1).max(axis=1)
+    voiced = np.flatnonzero(peaks >= peak_threshold)
+    if not voiced.size:
+        return audio
+    pad = int(rate * pad_seconds)
+    start = max(int(voiced[0]) * frame - pad, 0)
+    end = min((int(voiced[-1]) + 1) * frame + pad, len(audio))
+    return audio[start:end]
+
+
 class AudioRecorder:
-    """使用 sounddevice 在記憶體中錄音"""
+    """使用 sounddevice 在記憶體中錄音（預先配置單一 int16 緩衝，callback 內不配置記憶體）。
 
-    def __init__(self, sample_rate: int = 16000, channels: int = 1):
-        self.sample_rate = sample_rate
+    以裝置原生取樣率開串流（避免 OS 端即時重取樣的延遲），
+    停止後才在 encode() 一次重取樣為 sample_rate。
+    keep_open=True 時串流在建構時開啟並常駐，start()/halt() 只切換旗標，
+    省去每次按鍵開關裝置（WASAPI 上常見 50-200 ms）；程式結束前呼叫 shutdown()。
+    """
+
+    _PREALLOC_SECONDS = 60  # 預先配置的錄音長度；超過時才倍增擴充
+    _BLOCK_SECONDS = 0.016  # 固定 callback 區塊長度（16 kHz 為 256 frames），依 capture_rate 換算
+    _READY_SECONDS = 0.25   # 收到這麼長的音訊才算麥克風已就緒（可 beep）
+    _MAX_UPLOAD_RATE = 16000  # Whisper 內部一律以 16 kHz 處理，上傳更高取樣率只是浪費頻寬
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, upload_format: str = "flac",
+                 keep_open: bool = False):
+        self.sample_rate = min(sample_rate, self._MAX_UPLOAD_RATE)
         self.channels = channels
+        self.capture_rate = _native_input_rate(self.sample_rate)
+        self.upload_format = upload_format if upload_format in _UPLOAD_FORMATS else "flac"
+        self.keep_open = keep_open
         self.is_recording = False
-        self._frames: list[np.ndarray] = []
+        self._ready_samples = int(self._READY_SECONDS * self.capture_rate)
+        self._ready_at = self._ready_samples
+        self._buf = np.empty((self._PREALLOC_SECONDS * self.capture_rate, channels), dtype=np.int16)
+        self._buf_addr = self._buf.ctypes.data  # 緩衝位址只在配置 / 擴充時取一次
+        self._frame_bytes = channels * self._buf.itemsize
+        self._widx = 0
+        self._ready = threading.Event()
+        # 常駐串流時 callback 不會停：halt() 取鎖翻旗標，確保回傳後不再有寫入
+        self._lock = threading.Lock()
         self._stream: sd.InputStream | None = None
+        if keep_open:
+            try:
+                self._open_stream()
+            except Exception as e:
+                print(f"⚠️  麥克風預先開啟失敗，改於錄音時開啟：{e}")
 
-    def start(self):
-        self._frames = []
-        self.is_recording = True
+    def _open_stream(self):
         self._stream = sd.InputStream(
-            samplerate=self.sample_rate,
+            samplerate=self.capture_rate,
             channels=self.channels,
             dtype="int16",
+            blocksize=int(self.capture_rate * self._BLOCK_SECONDS),
+            latency="low",
             callback=self._callback,
         )
         self._stream.start()
 
-    def _callback(self, indata, frames, time_info, status):
-        if self.is_recording:
-            self._frames.append(indata.copy())
-
-    def stop(self) -> str | None:
-        self.is_recording = False
+    def _close_stream(self):
         if self._stream:
             self._stream.stop()
             self._stream.close()
             self._stream = None
 
-        if not self._frames:
-            return None
+    def start(self, resume: bool = False):
+        """開始錄音；resume=True 時接在上一段（尚未送出的）錄音之後，不清空緩衝"""
+        with self._lock:
+            if not resume:
+                self._widx = 0
+            self._ready_at = self._widx + self._ready_samples
+            self._ready.clear()
+            self.is_recording = True
+        if self._stream is not None and not self._stream.active:
+            self._close_stream()  # 常駐串流因裝置錯誤停止，重新開啟
+        if self._stream is None:
+            self._open_stream()
 
-        audio_data = np.concatenate(self._frames, axis=0)
-        duration = len(audio_data) / self.sample_rate
-        if duration < 0.5:
-            return None
+    def _callback(self, indata, frames, time_info, status):
+        with self._lock:
+            if not self.is_recording:
+                return
+            n = len(indata)
+            end = self._widx + n
+            if end > len(self._buf):
+                self._buf = np.resize(self._buf, (max(len(self._buf) * 2, end), self.channels))
+                self._buf_addr = self._buf.ctypes.data
+            # indata 是 PortAudio 交來的 C 連續 int16（callback 返回後即失效），
+            # 直接 memmove 進預先配置的緩衝，不經 numpy 切片 / broadcast
+            ctypes.memmove(self._buf_addr + self._widx * self._frame_bytes, indata.ctypes.data, indata.nbytes)
+            self._widx = end
+        if end > self._ready_at and not self._ready.is_set():
+            self._ready.set()
+
+    def halt(self) -> float:
+        """停止錄音但不編碼，回傳錄音秒數（keep_open 時串流保持開啟）"""
+        with self._lock:
+            self.is_recording = False
+        if not self.keep_open:
+            self._close_stream()
+        return self._widx / self.capture_rate
 
-        wav_path = os.path.join(tempfile.gettempdir(), "whisper_voice.wav")
-        sf.write(wav_path, audio_data, self.sample_rate, subtype="PCM_16")
-        return wav_path
+    def shutdown(self):
+        """關閉常駐串流"""
+        with self._lock:
+            self.is_recording = False
+        self._close_stream()
+
+    def is_silent(self, peak_threshold: int, rms_threshold: float) -> bool:
+        """向量化判斷整段錄音是否無語音（peak 或 RMS 低於門檻）；門檻設 0 即停用"""
+        audio = self._buf[:self._widx].reshape(-1)
+        if not audio.size:
+            return True
+        peak = int(np.abs(audio.astype(np.int32)).max())
+        samples = audio.astype(np.float32)
+        rms = float(np.sqrt(np.dot(samples, samples) / samples.size))
+        return peak < peak_threshold or rms < rms_threshold
+
+    def encode(self, trim_peak: int = 0) -> io.BytesIO:
+        """把已停止的錄音編碼為記憶體內音訊緩衝（格式依 upload_format，不落地暫存檔）。
+
+        trim_peak > 0 時先裁掉前後低於該 peak 的靜音，再重取樣，減少上傳量。
+        """
+        audio_data = _trim_silence(self._buf[:self._widx], self.capture_rate, trim_peak)
+        audio_data = _resample(audio_data, self.capture_rate, self.sample_rate)
+        # 確保交給 tobytes()/libsndfile 的是連續 int16（已是時不複製），避免內部 float 往返轉換
+        audio_data = np.ascontiguousarray(audio_data, dtype=np.int16)
+        if self.upload_format == "wav":
+            # PCM16 WAV 只是 44-byte 標頭 + 原始取樣，直接組出，不經 libsndfile
+            data = audio_data.tobytes()
+            return io.BytesIO(_wav_header(self.sample_rate, self.channels, len(data)) + data)
+        fmt, subtype, _, _ = _UPLOAD_FORMATS[self.upload_format]
+        buf = io.BytesIO()
+        sf.write(buf, audio_data, self.sample_rate, format=fmt, subtype=subtype)
+        buf.seek(0)
+        return buf
+
+    def wait_ready(self, timeout: float) -> bool:
+        """等待麥克風開始送出音訊（由 callback 通知，不輪詢）"""
+        return self._ready.wait(timeout)
+
+    def read_from(self, start: int) -> tuple[bytes, int]:
+        """取出 [start, 目前寫入位置) 的 PCM bytes（capture_rate），回傳 (bytes, 新位置)。供錄音中串流上傳。"""
+        end = self._widx  # 先讀索引再讀緩衝：擴充時新緩衝已含舊資料
+        return self._buf[start:end].tobytes(), end
 
     @property
     def buffer_samples(self) -> int:
-        return sum(len(f) for f in self._frames)
+        """已收到的取樣數。寫入索引即計數器，O(1)，可在 polling 迴圈中頻繁呼叫。"""
+        return self._widx
 
 
 # ---------------------------------------------------------------------------
 # Whisper API
 # ---------------------------------------------------------------------------
 
-def transcribe(wav_path: str, config: dict) -> str:
+# 全程共用一個 Session：保留 keep-alive 連線，第二次起的辨識省掉 TCP + TLS 握手
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    # 只重試連線建立（請求尚未送出），不依狀態碼重試、不重送 body：
+    # POST 不在 Retry 預設的 allowed_methods 內，串流上傳的 generator body 也無法重播
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2),
+))
+
+
+_WARM_INTERVAL = 30.0  # 連線在這段時間內用過就不預熱（仍在 keep-alive 中）
+_last_api_use = 0.0    # 最近一次 API 請求完成的 time.monotonic()
+_warm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm")
+_warm_future: Future | None = None
+
+
+def _mark_api_use():
+    global _last_api_use
+    _last_api_use = time.monotonic()
+
+
+def _warm(api_key: str):
+    try:
+        _SESSION.head("https://api.openai.com/v1/models",
+                      headers={"Authorization": f"Bearer {api_key}"}, timeout=5)
+        _mark_api_use()
+    except requests.RequestException:
+        pass
+
+
+def warm_connection(api_key: str):
+    """對 API 主機發帶授權的輕量 HEAD，預先把 TCP + TLS 連線放進連線池（失敗也不影響）。
+
+    交給單一常駐執行緒、不阻塞呼叫端；連線 _WARM_INTERVAL 秒內用過、
+    或上一次預熱尚未完成時直接略過。
+    """
+    global _warm_future
+    if time.monotonic() - _last_api_use < _WARM_INTERVAL:
+        return
+    if _warm_future is not None and not _warm_future.done():
+        return
+    _warm_future = _warm_executor.submit(_warm, api_key)
+
+
+def transcribe(audio_buf: io.BytesIO, config: dict) -> str:
     url = "https://api.openai.com/v1/audio/transcriptions"
     headers = {"Authorization": f"Bearer {config['api_key']}"}
 
-    with open(wav_path, "rb") as f:
-        files = {"file": ("voice.wav", f, "audio/wav")}
-        data = {
-            "model": config["model"],
-            "language": config["language"],
-            "temperature": str(config["temperature"]),
-            "response_format": config["response_format"],
-            "prompt": config["prompt"],
-        }
-        response = requests.post(url, headers=headers, files=files, data=data, timeout=30)
+    _, _, filename, mime = _UPLOAD_FORMATS.get(config["upload_format"], _UPLOAD_FORMATS["flac"])
+    # MultipartEncoder 邊讀邊送，不先在記憶體組出整個 multipart body
+    body = MultipartEncoder(fields={
+        "file": (filename, audio_buf, mime),
+        "model": config["model"],
+        "language": config["language"],
+        "temperature": str(config["temperature"]),
+        "response_format": config["response_format"],
+        "prompt": config["prompt"],
+    })
+    headers["Content-Type"] = body.content_type
+    response = _SESSION.post(url, headers=headers, data=body, timeout=30)
+    _mark_api_use()
 
     response.raise_for_status()
-    return response.json()["text"]
+    return orjson.loads(response.content)["text"]
+
+
+def _wav_header(sample_rate: int, channels: int, data_size: int = 0xFFFFFFFF) -> bytes:
+    """44-byte PCM16 WAV header；data_size 省略時為長度未知（串流用，0xFFFFFFFF）"""
+    riff_size = 0xFFFFFFFF if data_size == 0xFFFFFFFF else 36 + data_size
+    block_align = channels * 2
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate,
+                      sample_rate * block_align, block_align, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
 
 
-# ---------------------------------------------------------------------------
-# 後處理
-# ---------------------------------------------------------------------------
+class _UploadCancelled(Exception):
+    pass
+
+
+class StreamingUpload:
+    """按下熱鍵即開始上傳：以 chunked transfer 邊錄邊送 multipart body。
 
-def apply_corrections(text: str, regex_rules: list[dict]) -> str:
-    for rule in regex_rules:
-        flags = 0
-        flag_str = rule.get("flags", "")
-        if "IGNORECASE" in flag_str.upper():
-            flags |= re.IGNORECASE
-        text = re.sub(rule["pattern"], rule["replacement"], text, flags=flags)
-    return text.strip()
+    WAV 長度未知，header 以 0xFFFFFFFF 表示；放開按鍵後送出結尾 boundary，
+    上傳時間因此藏在錄音時間內。錄音太短時 cancel() 中斷連線。
+    僅在裝置原生取樣率等於 sample_rate 時使用：送 PCM16 WAV（不套用 upload_format / 重取樣）。
+    """
+
+    def __init__(self, recorder: AudioRecorder, config: dict):
+        self._recorder = recorder
+        self._config = config
+        self._boundary = uuid.uuid4().hex
+        self._finished = threading.Event()
+        self._cancelled = threading.Event()
+        self._drained = threading.Event()  # 錄音緩衝已全部讀出，可開始下一段錄音
+        self._read_lock = threading.Lock()  # 讀取錄音緩衝期間持有；cancel() 取得後即保證不再讀取
+        self._text: str | None = None
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _part_header(self, name: str, extra: str = "") -> bytes:
+        return (
+            f"--{self._boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"{extra}\r\n'
+        ).encode()
+
+    def _body(self):
+        cfg = self._config
+        fields = {
+            "model": cfg["model"],
+            "language": cfg["language"],
+            "temperature": str(cfg["temperature"]),
+            "response_format": cfg["response_format"],
+            "prompt": cfg["prompt"],
+        }
+        for name, value in fields.items():
+            yield self._part_header(name) + b"\r\n" + str(value).encode() + b"\r\n"
+        yield (self._part_header("file", '; filename="voice.wav"')
+               + b"Content-Type: audio/wav\r\n\r\n"
+               + _wav_header(self._recorder.capture_rate, self._recorder.channels))
+
+        sent = 0
+        while True:
+            with self._read_lock:
+                if self._cancelled.is_set():
+                    raise _UploadCancelled()
+                finished = self._finished.is_set()  # 先讀旗標，確保之後的 read_from 拿到最後一段
+                chunk, sent = self._recorder.read_from(sent)
+            if chunk:
+                yield chunk
+            elif finished:
+                break
+            else:
+                time.sleep(0.05)
+        self._drained.set()
+        yield f"\r\n--{self._boundary}--\r\n".encode()
+
+    def _run(self):
+        headers = {
+            "Authorization": f"Bearer {self._config['api_key']}",
+            "Content-Type": f"multipart/form-data; boundary={self._boundary}",
+        }
+        try:
+            response = _SESSION.post(
+                "https://api.openai.com/v1/audio/transcriptions",
+                headers=headers, data=self._body(), timeout=30,
+            )
+            _mark_api_use()
+            response.raise_for_status()
+            self._text = orjson.loads(response.content)["text"]
+        except Exception as e:
+            self._error = e
+        finally:
+            self._drained.set()
+
+    def end_body(self, timeout: float = 5.0) -> bool:
+        """錄音已停止：等剩餘 PCM 從錄音緩衝讀出後返回 True（之後緩衝可重用）。
+
+        逾時（上傳卡住）時中斷上傳並回傳 False，呼叫端改走一般上傳。
+        """
+        self._finished.set()
+        if self._drained.wait(timeout):
+            return True
+        self.cancel()
+        return False
+
+    def finish(self) -> str:
+        """送完 body 並等待辨識結果（錯誤原樣拋出）"""
+        self.end_body()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._text or ""
+
+    def cancel(self):
+        """中斷上傳；返回後 uploader 不會再讀取錄音緩衝，可立即 start() 下一段"""
+        with self._read_lock:
+            self._cancelled.set()
 
 
 # ---------------------------------------------------------------------------
 # Beep
 # ---------------------------------------------------------------------------
 
+_TINK_PATH = "/System/Library/Sounds/Tink.aiff"
+
+
+@functools.lru_cache(maxsize=1)
+def _tink_sound():
+    """預先載入 macOS Tink 音效為 NSSound（需 pyobjc AppKit；沒有則回傳 None）"""
+    try:
+        from AppKit import NSSound
+    except ImportError:
+        return None
+    return NSSound.alloc().initWithContentsOfFile_byReference_(_TINK_PATH, True)
+
+
 def beep():
     try:
         if sys.platform == "win32":
             import winsound
             winsound.Beep(1000, 200)
         elif sys.platform == "darwin":
-            os.system("afplay /System/Library/Sounds/Tink.aiff &")
+            sound = _tink_sound()
+            if sound is not None:
+                sound.stop()
+                sound.play()
+            else:
+                subprocess.Popen(["afplay", _TINK_PATH])  # 不經 shell，直接啟動 afplay
         else:
             print("\a", end="", flush=True)
     except Exception:
@@ -336,23 +721,215 @@ def beep():
 # 貼上
 # ---------------------------------------------------------------------------
 
-def paste_text(text: str):
-    from pynput.keyboard import Controller, Key
+# Win32 SendInput 結構（KEYEVENTF_UNICODE 直接送字元，不經剪貼簿）
+_INPUT_KEYBOARD = 1
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_UNICODE = 0x0004
 
-    pyperclip.copy(text)
-    time.sleep(0.05)
 
-    kb = Controller()
-    if sys.platform == "darwin":
-        kb.press(Key.cmd)
-        kb.press("v")
-        kb.release("v")
-        kb.release(Key.cmd)
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class _KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", _MOUSEINPUT), ("ki", _KEYBDINPUT)]  # union 大小須與 MOUSEINPUT 一致
+
+
+class _INPUT(ctypes.Structure):
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+def _type_unicode_win32(text: str) -> bool:
+    """以單次 SendInput 送出整段文字（UTF-16 code unit，surrogate pair 自然成對）"""
+    data = text.encode("utf-16-le")
+    units = [int.from_bytes(data[i:i + 2], "little") for i in range(0, len(data), 2)]
+    inputs = (_INPUT * (len(units) * 2))()
+    for i, unit in enumerate(units):
+        for j, flags in enumerate((_KEYEVENTF_UNICODE, _KEYEVENTF_UNICODE | _KEYEVENTF_KEYUP)):
+            inp = inputs[i * 2 + j]
+            inp.type = _INPUT_KEYBOARD
+            inp.u.ki.wScan = unit
+            inp.u.ki.dwFlags = flags
+    sent = ctypes.windll.user32.SendInput(len(inputs), inputs, ctypes.sizeof(_INPUT))
+    return sent == len(inputs)
+
+
+def _type_unicode_darwin(text: str) -> bool:
+    """以 CGEventKeyboardSetUnicodeString 送出文字（需 pyobjc Quartz；每個事件最多 20 字）"""
+    try:
+        from Quartz import (
+            CGEventCreateKeyboardEvent,
+            CGEventKeyboardSetUnicodeString,
+            CGEventPost,
+            kCGHIDEventTap,
+        )
+    except ImportError:
+        return False
+    for i in range(0, len(text), 20):
+        chunk = text[i:i + 20]
+        for key_down in (True, False):
+            event = CGEventCreateKeyboardEvent(None, 0, key_down)
+            CGEventKeyboardSetUnicodeString(event, len(chunk.encode("utf-16-le")) // 2, chunk)
+            CGEventPost(kCGHIDEventTap, event)
+    return True
+
+
+def _type_unicode(text: str) -> bool:
+    try:
+        if sys.platform == "win32":
+            return _type_unicode_win32(text)
+        if sys.platform == "darwin":
+            return _type_unicode_darwin(text)
+    except Exception as e:
+        print(f"⚠️  直接輸入失敗（{e}），改用剪貼簿貼上")
+    return False
+
+
+_CF_UNICODETEXT = 13
+_GMEM_MOVEABLE = 0x0002
+
+if sys.platform == "win32":
+    # 剪貼簿用到的 Win32 函式簽章只在匯入時宣告一次（64-bit 下 HGLOBAL / 指標需明確指定型別）
+    _kernel32, _user32 = ctypes.windll.kernel32, ctypes.windll.user32
+    _kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    _kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    _kernel32.GlobalLock.restype = wintypes.LPVOID
+    _kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    _kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    _kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    _user32.SetClipboardData.restype = wintypes.HANDLE
+    _user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+
+
+def _set_clipboard_win32(text: str) -> bool:
+    """直接以 Win32 API 寫入剪貼簿（CF_UNICODETEXT），不經 pyperclip 的平台偵測與 fallback"""
+    kernel32, user32 = _kernel32, _user32
+    data = text.encode("utf-16-le") + b"\0\0"
+    for _ in range(5):  # 剪貼簿可能暫時被其他程式占用
+        if user32.OpenClipboard(None):
+            break
+        time.sleep(0.01)
     else:
-        kb.press(Key.ctrl)
-        kb.press("v")
-        kb.release("v")
-        kb.release(Key.ctrl)
+        return False
+    try:
+        user32.EmptyClipboard()
+        hmem = kernel32.GlobalAlloc(_GMEM_MOVEABLE, len(data))
+        if not hmem:
+            return False
+        ptr = kernel32.GlobalLock(hmem)
+        if not ptr:
+            kernel32.GlobalFree(hmem)
+            return False
+        ctypes.memmove(ptr, data, len(data))
+        kernel32.GlobalUnlock(hmem)
+        if not user32.SetClipboardData(_CF_UNICODETEXT, hmem):
+            kernel32.GlobalFree(hmem)  # 成功時記憶體歸系統所有，失敗才自行釋放
+            return False
+        return True
+    finally:
+        user32.CloseClipboard()
+
+
+def _set_clipboard(text: str) -> bool:
+    """寫入剪貼簿；回傳 True 表示已經由 Win32 API 同步寫入（CloseClipboard 返回即完成，貼上前不需等待）"""
+    if sys.platform == "win32":
+        try:
+            if _set_clipboard_win32(text):
+                return True
+        except Exception as e:
+            print(f"⚠️  Win32 剪貼簿寫入失敗（{e}），改用 pyperclip")
+    pyperclip.copy(text)
+    return False
+
+
+_VK_CONTROL = 0x11
+_VK_V = 0x56
+
+
+def _send_ctrl_v_win32() -> bool:
+    """以單次 SendInput 送出 Ctrl 按下、V 按下、V 放開、Ctrl 放開"""
+    steps = ((_VK_CONTROL, 0), (_VK_V, 0), (_VK_V, _KEYEVENTF_KEYUP), (_VK_CONTROL, _KEYEVENTF_KEYUP))
+    inputs = (_INPUT * len(steps))()
+    for inp, (vk, flags) in zip(inputs, steps):
+        inp.type = _INPUT_KEYBOARD
+        inp.u.ki.wVk = vk
+        inp.u.ki.dwFlags = flags
+    return ctypes.windll.user32.SendInput(len(inputs), inputs, ctypes.sizeof(_INPUT)) == len(inputs)
+
+
+_KB = keyboard.Controller()  # 建立一次重複使用
+_PASTE_MODIFIER = keyboard.Key.cmd if sys.platform == "darwin" else keyboard.Key.ctrl
+
+
+def paste_text(text: str, method: str = "clipboard"):
+    """送出文字到游標位置。
+
+    method="clipboard"（預設）：剪貼簿 + Ctrl/Cmd+V；即使按鍵被擋，文字仍留在剪貼簿可手動貼上。
+    method="type"：直接送 Unicode 按鍵事件，不動剪貼簿、無 50ms 等待；失敗時改走剪貼簿。
+    注意：目標為系統管理員權限視窗時 UIPI 會擋下 SendInput 但仍回報成功，文字會遺失，故不設為預設。
+    """
+    if method == "type" and _type_unicode(text):
+        return
+
+    if not _set_clipboard(text):
+        time.sleep(0.05)  # pyperclip 路徑保留原本的等待
+
+    if sys.platform == "win32" and _send_ctrl_v_win32():
+        return
+    with _KB.pressed(_PASTE_MODIFIER):
+        _KB.press("v")
+        _KB.release("v")
+
+
+# ---------------------------------------------------------------------------
+# 熱鍵（Windows：RegisterHotKey，只收指定按鍵，不掛全域鍵盤 hook）
+# ---------------------------------------------------------------------------
+
+_WM_HOTKEY = 0x0312
+_MOD_NOREPEAT = 0x4000
+_VK_F1 = 0x70
+_HOTKEY_POLL_SECONDS = 0.01
+
+
+def run_win32_hotkey(hotkey: str, on_press, on_release) -> bool:
+    """以 RegisterHotKey 等待熱鍵按下，按住期間輪詢 GetAsyncKeyState 偵測放開。
+
+    其他按鍵完全不會進到 Python。註冊失敗（例如熱鍵已被占用）回傳 False，
+    由呼叫端改用 pynput；成功則在此執行訊息迴圈，不會返回。
+    """
+    user32 = ctypes.windll.user32
+    vk = _VK_F1 + int(hotkey[1:]) - 1 if re.fullmatch(r"f([1-9]|1[0-2])", hotkey) else _VK_F1 + 8
+    if not user32.RegisterHotKey(None, 1, _MOD_NOREPEAT, vk):
+        return False
+    msg = wintypes.MSG()
+    try:
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            if msg.message != _WM_HOTKEY:
+                continue
+            on_press()
+            while user32.GetAsyncKeyState(vk) & 0x8000:
+                time.sleep(_HOTKEY_POLL_SECONDS)
+            on_release()
+    finally:
+        user32.UnregisterHotKey(None, 1)
+    return True
 
 
 # ---------------------------------------------------------------------------
@@ -370,7 +947,6 @@ def main():
     if not config["api_key"] or config["api_key"] == "YOUR_OPENAI_API_KEY_HERE":
         if sys.platform == "win32":
             try:
-                import ctypes
                 ctypes.windll.user32.MessageBoxW(
                     0,
                     "請先設定 OpenAI API Key！\n\n"
@@ -388,14 +964,27 @@ def main():
     # ── 3. 啟動系統匣圖示 ──────────────────────────────────────────────────
     tray = TrayIcon(hotkey=config["hotkey"])
     tray.start()
+    if sys.platform == "darwin":
+        _tink_sound()  # 啟動時先載入提示音，第一次錄音不必等
+    warm_connection(config["api_key"])  # 第一次辨識也免握手
 
     # ── 4. 初始化錄音 ──────────────────────────────────────────────────────
     recorder = AudioRecorder(
         sample_rate=config["sample_rate"],
         channels=config["channels"],
+        upload_format=config["upload_format"],
+        keep_open=config["keep_stream_open"],
     )
+    # 串流上傳送的是原始 PCM，無法邊錄邊重取樣；裝置原生取樣率不等於 sample_rate 時改走一般上傳，
+    # 避免把 48 kHz 音訊原樣送出（上傳量為 16 kHz 的 3 倍）
+    stream_upload = config["stream_upload"] and recorder.capture_rate == recorder.sample_rate
+    if config["stream_upload"] and not stream_upload:
+        print(f"ℹ️  輸入裝置為 {recorder.capture_rate} Hz（非 {recorder.sample_rate} Hz），停用串流上傳")
     recording = False
     lock = threading.Lock()
+    upload: StreamingUpload | None = None
+    short_clip_at = None  # 上一段「太短」錄音結束的時間；短時間內再按鍵則接續錄音
+    generation = 0        # 每次開始錄音 +1；cancel_on_repress 時用來判斷結果是否已過時
 
     print("=" * 50)
     print("🎤 Whisper 語音轉文字工具已啟動")
@@ -405,34 +994,68 @@ def main():
     print("=" * 50)
 
     # ── 5. 熱鍵偵測 ────────────────────────────────────────────────────────
-    from pynput import keyboard
-
     hotkey_map = {f"f{i}": getattr(keyboard.Key, f"f{i}") for i in range(1, 13)}
     target_key = hotkey_map.get(config["hotkey"].lower(), keyboard.Key.f9)
 
     def _do_start_recording():
+        nonlocal upload, short_clip_at, generation
+        generation += 1
+        resume = (short_clip_at is not None
+                  and time.monotonic() - short_clip_at < config["coalesce_seconds"])
+        short_clip_at = None
         tray.set_state(TRAY_RECORDING)
-        print("🔴 錄音中... （放開按鍵停止）")
-        recorder.start()
+        print("🔴 錄音中... （接續上一段）" if resume else "🔴 錄音中... （放開按鍵停止）")
+        recorder.start(resume=resume)
+        if stream_upload:
+            upload = StreamingUpload(recorder, config)
+            upload.start()
+        else:
+            # 使用者說話期間先確認 / 重建連線（閒置連線可能已被伺服器關閉），放開按鍵即可直接上傳
+            warm_connection(config["api_key"])
 
-        for _ in range(60):
-            time.sleep(0.05)
-            if recorder.buffer_samples > 4000:
-                beep()
-                break
+        if recorder.wait_ready(3.0):
+            beep()
 
-    def _do_process_recording():
-        wav_path = recorder.stop()
-        if not wav_path:
-            tray.set_state(TRAY_IDLE)
-            print("⚠️  錄音時間太短，已忽略")
+    def _do_stop_recording():
+        nonlocal upload, short_clip_at
+        pending, upload = upload, None
+        duration = recorder.halt()
+        if duration < 0.5:
+            # 連按 / 誤觸：先保留音訊，coalesce_seconds 內再按下會接在這段之後，合併成一次請求
+            short_clip_at = time.monotonic()
+            reason = "⚠️  錄音時間太短，已忽略"
+        elif recorder.is_silent(config["silence_peak"], config["silence_rms"]):
+            reason = "⚠️  未偵測到語音，已忽略"
+        else:
+            if pending and pending.end_body():
+                audio_buf = None
+            else:
+                if pending:
+                    print("⚠️  串流上傳逾時，改為一般上傳")
+                    pending = None
+                audio_buf = recorder.encode(config["silence_peak"] if config["trim_silence"] else 0)
+            process_q.put((audio_buf, pending, generation))
             return
 
+        if pending:
+            pending.cancel()
+        tray.set_state(TRAY_IDLE)
+        print(reason)
+
+    def _is_stale(job_generation):
+        return config["cancel_on_repress"] and job_generation != generation
+
+    def _do_process_recording(audio_buf, pending, job_generation):
+        if _is_stale(job_generation):  # 排隊期間使用者已重新錄音：不送 API
+            if pending:
+                pending.cancel()
+            print("⏭️  已重新錄音，略過上一段")
+            return
         tray.set_state(TRAY_PROCESSING)
         print("🔄 辨識中...")
 
         try:
-            raw_text = transcribe(wav_path, config)
+            raw_text = pending.finish() if pending else transcribe(audio_buf, config)
         except requests.exceptions.HTTPError as e:
             status = e.response.status_code if e.response else "?"
             msg = {401: "API Key 無效", 429: "請求過於頻繁"}.get(status, f"API 錯誤 HTTP {status}")
@@ -454,38 +1077,83 @@ def main():
             tray.set_state(TRAY_IDLE)
             return
 
-        final_text = apply_corrections(raw_text, config["regex_rules"])
+        final_text = config["_apply"](raw_text) if raw_text else ""
         if not final_text:
             print("⚠️  辨識結果為空")
             tray.set_state(TRAY_IDLE)
             return
 
-        paste_text(final_text)
+        if _is_stale(job_generation):  # 等待回應期間使用者已重新錄音：不貼上過時結果
+            print(f"⏭️  已重新錄音，捨棄：{final_text}")
+            return
+
+        paste_text(final_text, config["paste_method"])
         print(f"✅ 已貼上：{final_text}")
         tray.set_state(TRAY_IDLE)
 
-    def on_press(key):
+    # 常駐 worker：熱鍵 callback 只投遞工作，不再每次按鍵建立執行緒。
+    # 錄音開始/停止在同一 worker 依序執行；辨識交給另一個 worker，
+    # 辨識進行中仍可立即開始下一段錄音。
+    job_q: queue.Queue = queue.Queue()
+    process_q: queue.Queue = queue.Queue()
+
+    def _control_worker():
+        while True:
+            job = job_q.get()
+            try:
+                if job == "start":
+                    _do_start_recording()
+                else:
+                    _do_stop_recording()
+            except Exception as e:  # worker 常駐，單次失敗不可讓執行緒結束
+                print(f"❌ 錄音失敗：{e}")
+                tray.set_state(TRAY_IDLE)
+
+    def _process_worker():
+        while True:
+            job = process_q.get()
+            try:
+                _do_process_recording(*job)
+            except Exception as e:
+                print(f"❌ 發生錯誤：{e}")
+                tray.set_state(TRAY_IDLE)
+
+    threading.Thread(target=_control_worker, daemon=True).start()
+    threading.Thread(target=_process_worker, daemon=True).start()
+
+    def _hotkey_down():
         nonlocal recording
-        if key != target_key:
-            return
         with lock:
             if recording:
                 return
             recording = True
-        threading.Thread(target=_do_start_recording, daemon=True).start()
+        job_q.put_nowait("start")
 
-    def on_release(key):
+    def _hotkey_up():
         nonlocal recording
-        if key != target_key:
-            return
         with lock:
             if not recording:
                 return
             recording = False
-        threading.Thread(target=_do_process_recording, daemon=True).start()
+        job_q.put_nowait("stop")
 
-    with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
-        listener.join()
+    def on_press(key):
+        if key == target_key:
+            _hotkey_down()
+
+    def on_release(key):
+        if key == target_key:
+            _hotkey_up()
+
+    try:
+        if sys.platform == "win32" and run_win32_hotkey(config["hotkey"].lower(), _hotkey_down, _hotkey_up):
+            return
+        if sys.platform == "win32":
+            print(f"⚠️  無法註冊熱鍵 {config['hotkey'].upper()}（可能已被其他程式占用），改用鍵盤監聽")
+        with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
+            listener.join()
+    finally:
+        recorder.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
 """音訊錄音模組"""
 from __future__ import annotations
 
+import io
 import logging
-import os
-import tempfile
+import struct
+import threading
+import time
 
 import numpy as np
 import sounddevice as sd
@@ -12,53 +14,204 @@ import soundfile as sf
 logger = logging.getLogger(__name__)
 
 
+def _resolve_input_device(spec) -> int | None:
+    """把 config 的 input_device（None / 索引 / 名稱 / 名稱清單）解析為裝置索引。
+
+    名稱以不分大小寫的子字串比對有輸入聲道的裝置，清單依序取第一個找得到的；
+    都找不到時回傳 None（系統預設輸入），不中斷錄音。
+    """
+    if spec is None or isinstance(spec, int):
+        return spec
+    names = [spec] if isinstance(spec, str) else list(spec)
+    try:
+        devices = sd.query_devices()
+    except Exception as e:
+        logger.warning("⚠️  無法列出音訊裝置，改用預設輸入（%s）", e)
+        return None
+    for name in names:
+        for idx, dev in enumerate(devices):
+            if dev["max_input_channels"] > 0 and str(name).lower() in dev["name"].lower():
+                return idx
+    logger.warning("⚠️  找不到指定輸入裝置 %s，改用預設輸入", names)
+    return None
+
+
+def _wav_header(sample_rate: int, channels: int) -> bytes:
+    """長度未知的 44-byte PCM16 WAV header（串流上傳用，RIFF / data 長度填 0xFFFFFFFF）"""
+    block_align = channels * 2
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate,
+                      sample_rate * block_align, block_align, 16)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _trim_silence(audio: np.ndarray, rate: int, peak_threshold: int, pad_seconds: float = 0.1) -> np.ndarray:
+    """以 10 ms 為單位找出第一個 / 最後一個 peak 達門檻的區塊，裁掉前後靜音（各保留 pad_seconds）；
+    整段都未達門檻時原樣回傳（交給 STT 判斷，不在這裡丟棄）"""
+    frame = max(rate // 100, 1)
+    n_frames = len(audio) // frame
+    if peak_threshold <= 0 or not n_frames:
+        return audio
+    peaks = np.abs(audio[:n_frames * frame].astype(np.int32)).reshape(n_frames, -1).max(axis=1)
+    voiced = np.flatnonzero(peaks >= peak_threshold)
+    if not voiced.size:
+        return audio
+    pad = int(rate * pad_seconds)
+    start = max(int(voiced[0]) * frame - pad, 0)
+    end = min((int(voiced[-1]) + 1) * frame + pad, len(audio))
+    return audio[start:end]
+
+
+# upload_codec → soundfile 寫出參數；FLAC level 0 為無損、CPU 極低，語音約為 WAV 的 1/2 ~ 2/3
+_UPLOAD_CODECS = {
+    "wav":  {"format": "WAV", "subtype": "PCM_16"},
+    "flac": {"format": "FLAC", "subtype": "PCM_16", "compression_level": 0.0},
+}
+
+
 class AudioRecorder:
-    """使用 sounddevice 在記憶體中錄音，stop() 回傳隨機 NamedTemp WAV 路徑。"""
+    """使用 sounddevice 在記憶體中錄音，stop() 回傳記憶體內 WAV（io.BytesIO），不落地暫存檔。
+
+    錄音寫入預先配置的單一 int16 緩衝（不足時倍增），callback 只做一次切片複製、
+    不配置記憶體；stop() 直接取緩衝的 view，不再 np.concatenate。
+    """
 
-    def __init__(self, sample_rate: int = 16000, channels: int = 1):
-        self.sample_rate = sample_rate
-        self.channels = channels
+    _PREALLOC_SECONDS = 120
+    # STT 端一律重採樣為 16 kHz 單聲道；錄更高規格只會讓上傳變大，故在擷取端就固定上限
+    _MAX_SAMPLE_RATE = 16000
+    MIN_SECONDS = 0.5  # 短於此秒數視為誤觸，stop() 不編碼
+
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, input_device=None,
+                 upload_codec: str = "wav", trim_silence_peak: int = 500):
+        if sample_rate > self._MAX_SAMPLE_RATE or channels != 1:
+            logger.info("ℹ️  錄音規格 %d Hz / %d ch 改為 %d Hz 單聲道（上傳大小上限 ≈32 KB/s）",
+                        sample_rate, channels, min(sample_rate, self._MAX_SAMPLE_RATE))
+        self.sample_rate = min(sample_rate, self._MAX_SAMPLE_RATE)
+        self.channels = 1
+        self.input_device = input_device
+        if upload_codec not in _UPLOAD_CODECS:
+            logger.warning("⚠️  未知的 upload_codec %r，改用 wav", upload_codec)
+            upload_codec = "wav"
+        self.upload_codec = upload_codec
+        self.trim_silence_peak = trim_silence_peak  # 0 = 不裁切；500 ≈ -36 dBFS
         self.is_recording = False
-        self._frames: list[np.ndarray] = []
+        self._buf = np.empty((self._PREALLOC_SECONDS * self.sample_rate, 1), dtype=np.int16)
+        self._write = 0
+        self._first_frame = threading.Event()  # 第一個 callback 到達即 set，供提示音等待
+        self._stopped = threading.Event()      # stop() 關閉 stream 後 set，串流讀取以此收尾
         self._stream: sd.InputStream | None = None
+        self._device: int | None = None  # 解析後的裝置索引；開啟失敗時作廢，下次 start() 重新解析
+        self._device_resolved = False
 
     def start(self):
-        self._frames = []
+        self._write = 0
+        self._first_frame.clear()
+        self._stopped.clear()
         self.is_recording = True
-        self._stream = sd.InputStream(
+        if not self._device_resolved:
+            # query_devices 需列舉整個 CoreAudio 裝置表，只在第一次或裝置失效後做
+            self._device = _resolve_input_device(self.input_device)
+            self._device_resolved = True
+        stream_kwargs = dict(
             samplerate=self.sample_rate,
             channels=self.channels,
             dtype="int16",
+            device=self._device,
             callback=self._callback,
         )
-        self._stream.start()
+        try:
+            try:
+                # 固定 100 ms 區塊 + 低延遲：callback 次數穩定、每次只做一次切片複製
+                self._stream = sd.InputStream(
+                    blocksize=self.sample_rate // 10, latency="low", **stream_kwargs
+                )
+            except sd.PortAudioError as e:
+                logger.warning("⚠️  裝置不接受 100ms 區塊 / 低延遲設定（%s），改用預設", e)
+                self._stream = sd.InputStream(**stream_kwargs)
+            self._stream.start()
+        except sd.PortAudioError:
+            # 裝置拔除或索引變動：作廢快取，下次 start() 重新解析
+            self._device_resolved = False
+            self.is_recording = False
+            self._stream = None
+            raise
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                name = sd.query_devices(self._stream.device)["name"]
+            except Exception:
+                name = "?"
+            logger.debug("🎙  輸入裝置：%s", name)
 
     def _callback(self, indata, frames, time_info, status):
-        if self.is_recording:
-            self._frames.append(indata.copy())
+        if not self.is_recording:
+            return
+        n = len(indata)
+        end = self._write + n
+        if end > len(self._buf):
+            self._buf = np.resize(self._buf, (max(len(self._buf) * 2, end), self.channels))
+        self._buf[self._write:end] = indata  # 切片賦值即複製，indata 無需另行 .copy()
+        self._write = end
+        if not self._first_frame.is_set():
+            self._first_frame.set()
 
-    def stop(self) -> tuple[str | None, float]:
-        """停止錄音並寫入 NamedTemporaryFile WAV，回傳 (路徑, 秒數)。
-        呼叫者負責用後 os.unlink(path) 刪除暫存檔。"""
+    def stop(self, encode: bool = True) -> tuple[io.BytesIO | None, float]:
+        """停止錄音並依 upload_codec 編碼為記憶體內 WAV / FLAC，回傳 (緩衝, 秒數)；太短時緩衝為 None。
+
+        encode=False 時（音訊已由 stream_wav() 串流上傳）不裁切、不編碼，緩衝一律為 None。
+        """
         self.is_recording = False
         if self._stream:
             self._stream.stop()
             self._stream.close()
             self._stream = None
+        self._stopped.set()
 
-        if not self._frames:
+        if not self._write:
             return None, 0.0
 
-        audio_data = np.concatenate(self._frames, axis=0)
-        duration = len(audio_data) / self.sample_rate
-        if duration < 0.5:
+        duration = self._write / self.sample_rate
+        if not encode or duration < self.MIN_SECONDS:
             return None, duration
 
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        tmp.close()
-        sf.write(tmp.name, audio_data, self.sample_rate, subtype="PCM_16")
-        return tmp.name, duration
+        audio_data = _trim_silence(self._buf[:self._write], self.sample_rate, self.trim_silence_peak)
+        if len(audio_data) < self._write:
+            logger.debug("✂️  裁掉前後靜音 %.2fs", (self._write - len(audio_data)) / self.sample_rate)
+        self._log_level(audio_data)
+        buf = io.BytesIO()
+        sf.write(buf, audio_data, self.sample_rate, **_UPLOAD_CODECS[self.upload_codec])
+        buf.seek(0)
+        return buf, duration
+
+    @staticmethod
+    def _log_level(audio_data: np.ndarray):
+        samples = audio_data.reshape(-1).astype(np.float32) / 32768.0
+        rms = float(np.sqrt(np.dot(samples, samples) / samples.size))
+        peak = float(np.abs(samples).max())
+        logger.debug("🎚  RMS %.1f dBFS / Peak %.1f dBFS",
+                     20 * np.log10(max(rms, 1e-9)), 20 * np.log10(max(peak, 1e-9)))
+
+    def stream_wav(self, poll: float = 0.05):
+        """邊錄邊產出 WAV：先給長度未知的 header，再依序給已錄到的 int16 bytes，
+        stop() 關閉 stream 且緩衝讀完後結束。錄音中請勿再呼叫 start()。"""
+        yield _wav_header(self.sample_rate, self.channels)
+        sent = 0
+        while True:
+            stopped = self._stopped.is_set()  # 先讀旗標，確保之後讀到的是最後一段
+            end = self._write
+            if end > sent:
+                yield self._buf[sent:end].tobytes()  # 先取 end 再取 _buf：擴容後的新緩衝必含 [:end]
+                sent = end
+            elif stopped:
+                return
+            else:
+                time.sleep(poll)
+
+    def wait_first_frame(self, timeout: float = 3.0) -> bool:
+        """阻塞到麥克風送來第一批音訊（或逾時），回傳是否已收到。"""
+        return self._first_frame.wait(timeout)
 
     @property
     def buffer_samples(self) -> int:
-        return sum(len(f) for f in self._frames)
+        return self._write
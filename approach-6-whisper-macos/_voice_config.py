@@ -1,6 +1,7 @@
 """設定載入、Mode / ModeManager、config schema 驗證"""
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import os
@@ -8,9 +9,18 @@ import sys
 import threading
 from pathlib import Path
 
+from _voice_postprocess import compile_rules
+
 logger = logging.getLogger(__name__)
 
+# orjson 為選配：有裝就用（解析較快），沒有退回標準庫 json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
+@functools.lru_cache(maxsize=1)
 def get_base_dir() -> Path:
     if getattr(sys, "frozen", False):
         return Path(sys.executable).parent
@@ -30,6 +40,7 @@ class Mode:
         self.translate_to_english = raw.get("translate_to_english", False)
         self.prompt = raw.get("prompt", "")
         self.regex_rules = raw.get("regex_rules", [])
+        self.compiled_rules = compile_rules(self.regex_rules)  # 熱路徑直接用，不再每次解析
         self.grok_keyterms = raw.get("grok_keyterms", [])
         self.llm_prompt = raw.get("llm_prompt", "")
 
@@ -123,6 +134,10 @@ def validate_config(config: dict) -> None:
         raise ValueError("config.recording.sample_rate 必須為整數")
     if not isinstance(rec.get("channels"), int):
         raise ValueError("config.recording.channels 必須為整數")
+    if rec.get("upload_codec", "wav") not in ("wav", "flac"):
+        raise ValueError("config.recording.upload_codec 必須為 wav 或 flac")
+    if not isinstance(rec.get("trim_silence_peak", 0), int):
+        raise ValueError("config.recording.trim_silence_peak 必須為整數（0 = 不裁切）")
     input_device = rec.get("input_device")
     if input_device is not None and not isinstance(input_device, (int, str, list)):
         raise ValueError("config.recording.input_device 必須為字串、整數、陣列或 null")
@@ -165,8 +180,10 @@ def load_config() -> dict:
                 "endpoint": "https://api.groq.com/openai/v1/audio/transcriptions",
             },
             "temperature": 0.0,
+            "stream_upload": False,
         },
-        "recording": {"sample_rate": 16000, "channels": 1, "input_device": None},
+        "recording": {"sample_rate": 16000, "channels": 1, "input_device": None, "upload_codec": "wav",
+                      "trim_silence_peak": 500},
         "hotkey": {
             "record_key": "F1",
             "record_modifier": "ctrl",
@@ -200,12 +217,10 @@ def load_config() -> dict:
         base / "config.json",
         Path.home() / ".whisper-voice-typing" / "config.json",
     ]
+    cp = next((p for p in config_paths if p.exists()), None)
 
-    for cp in config_paths:
-        if not cp.exists():
-            continue
-        with open(cp, encoding="utf-8") as f:
-            user_cfg = json.load(f)
+    if cp is not None:
+        user_cfg = _json_loads(cp.read_bytes())
 
         if "modes" in user_cfg:
             config["modes"] = user_cfg["modes"]
@@ -214,6 +229,7 @@ def load_config() -> dict:
                 api_u = user_cfg["api"]
                 config["api"]["provider"] = api_u.get("provider", config["api"]["provider"])
                 config["api"]["temperature"] = api_u.get("temperature", config["api"]["temperature"])
+                config["api"]["stream_upload"] = bool(api_u.get("stream_upload", False))
                 for pname in ("openai", "grok", "groq"):
                     if pname in api_u:
                         config["api"][pname].update(api_u[pname])
@@ -269,7 +285,6 @@ def load_config() -> dict:
                 "regex_rules": old_regex,
             }]
             config["default_mode_id"] = "direct"
-        break
 
     # env.local / .env.local 覆蓋 API keys
     env_candidates = [
@@ -278,15 +293,14 @@ def load_config() -> dict:
         base.parent / "env.local",
         base.parent / ".env.local",
     ]
-    for env_file in env_candidates:
-        if env_file.exists():
-            with open(env_file, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, _, value = line.partition("=")
-                        os.environ.setdefault(key.strip(), value.strip())
-            break
+    env_file = next((p for p in env_candidates if p.exists()), None)
+    if env_file is not None:
+        with open(env_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    key, _, value = line.partition("=")
+                    os.environ.setdefault(key.strip(), value.strip())
 
     if os.environ.get("OPENAI_API_KEY"):
         config["api"]["openai"]["api_key"] = os.environ["OPENAI_API_KEY"]
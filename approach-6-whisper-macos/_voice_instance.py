@@ -7,7 +7,7 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-_lock_file_handle = None
+_lock_fd: int | None = None  # 保留 fd 參照，行程存活期間持有 flock
 _APP_SUPPORT_DIR = Path.home() / "Library" / "Application Support" / "WhisperVoice"
 _PID_FILE = _APP_SUPPORT_DIR / "WhisperVoice.pid"
 
@@ -23,18 +23,26 @@ def remove_pid_file() -> None:
 
 def ensure_single_instance(app_name: str = "WhisperVoiceTypingMac") -> bool:
     """使用 lockfile + fcntl.flock 防止重複啟動"""
-    global _lock_file_handle
+    global _lock_fd
     _APP_SUPPORT_DIR.mkdir(parents=True, exist_ok=True)
     lock_path = _APP_SUPPORT_DIR / f"{app_name}.lock"
     try:
         import fcntl
-        _lock_file_handle = open(lock_path, "w")
-        fcntl.flock(_lock_file_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        _lock_file_handle.write(str(os.getpid()))
-        _lock_file_handle.flush()
+    except ImportError:
         return True
-    except (IOError, OSError):
+    # 先取得鎖才截斷寫入 PID：不以 "w" 開檔，避免同時啟動的另一份把贏家的 PID 清掉
+    try:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
         logger.warning("⚠️  程式已經在執行中（lock: %s）", lock_path)
         return False
-    except ImportError:
-        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        logger.warning("⚠️  程式已經在執行中（lock: %s）", lock_path)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _lock_fd = fd
+    return True
@@ -2,8 +2,8 @@
 from __future__ import annotations
 
 import ctypes
+import functools
 import logging
-import os
 import subprocess
 import threading
 import time
@@ -12,13 +12,59 @@ import pyperclip
 
 logger = logging.getLogger(__name__)
 
+# pyobjc 原生 API 為選配：AppKit 隨 rumps 安裝，Quartz 另裝 pyobjc-framework-Quartz；
+# 缺哪個就退回 pyperclip / osascript 舊路徑。
+try:
+    from AppKit import NSPasteboard, NSPasteboardTypeString, NSWorkspace
+    _APPKIT_OK = True
+except ImportError:
+    _APPKIT_OK = False
+
+try:
+    from Quartz import (
+        CGEventCreateKeyboardEvent,
+        CGEventPost,
+        CGEventSetFlags,
+        kCGEventFlagMaskCommand,
+        kCGHIDEventTap,
+    )
+    _QUARTZ_OK = True
+except ImportError:
+    _QUARTZ_OK = False
+
+_KEYCODE_V = 9  # kVK_ANSI_V
+
 # ---------------------------------------------------------------------------
 # Beep
 # ---------------------------------------------------------------------------
 
+_TINK_PATH = "/System/Library/Sounds/Tink.aiff"
+
+
+@functools.lru_cache(maxsize=1)
+def _tink_sound():
+    """預先載入 Tink 音效為 NSSound（需 pyobjc AppKit；沒有則回傳 None）"""
+    try:
+        from AppKit import NSSound
+    except ImportError:
+        return None
+    return NSSound.alloc().initWithContentsOfFile_byReference_(_TINK_PATH, True)
+
+
+def preload_beep():
+    """預先載入提示音，第一次錄音不必等 NSSound 讀檔"""
+    _tink_sound()
+
+
 def beep():
     try:
-        os.system("afplay /System/Library/Sounds/Tink.aiff &")
+        sound = _tink_sound()
+        if sound is not None:
+            sound.stop()
+            sound.play()
+        else:
+            subprocess.Popen(["/usr/bin/afplay", _TINK_PATH],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # 不經 shell
     except Exception:
         print("\a", end="", flush=True)
 
@@ -28,14 +74,26 @@ def beep():
 # ---------------------------------------------------------------------------
 
 def get_frontmost_app() -> str:
-    """回傳目前前景 App 的 process 名稱。"""
+    """回傳目前前景 App 的 bundle identifier（如 com.apple.Terminal）。
+
+    用 bundle id 而非名稱：localizedName 會是「終端機」等在地化名稱，
+    AppleScript 的 tell application "…" 認不得；bundle id 則可用 tell application id "…"。
+    有 AppKit 走 NSWorkspace，不必啟動 osascript。
+    """
+    if _APPKIT_OK:
+        try:
+            app = NSWorkspace.sharedWorkspace().frontmostApplication()
+            return str(app.bundleIdentifier() or "") if app else ""
+        except Exception:
+            pass
     try:
         r = subprocess.run(
             ["osascript", "-e",
-             "tell application \"System Events\" to get name of first process whose frontmost is true"],
+             "tell application \"System Events\" to get bundle identifier of first process whose frontmost is true"],
             capture_output=True, text=True, timeout=2,
         )
-        return r.stdout.strip()
+        out = r.stdout.strip()
+        return "" if out == "missing value" else out
     except Exception:
         return ""
 
@@ -106,16 +164,64 @@ def _run_on_main_thread(fn, timeout: float = 5.0) -> bool:
 # 貼上
 # ---------------------------------------------------------------------------
 
-def paste_text(text: str, target_app: str = "") -> tuple[str, bool]:
+def _pasteboard_write(text: str) -> bool:
+    """NSPasteboard 寫入剪貼簿（須在主執行緒呼叫：AppKit 物件非執行緒安全）"""
+    try:
+        pb = NSPasteboard.generalPasteboard()
+        pb.clearContents()
+        return bool(pb.setString_forType_(text, NSPasteboardTypeString))
+    except Exception as e:
+        logger.debug("NSPasteboard 寫入失敗（%s）", e)
+        return False
+
+
+def _set_clipboard(text: str):
+    """在 GCD 主執行緒以 NSPasteboard 同步寫入剪貼簿；失敗或無 AppKit 時退回 pyperclip（pbcopy）並等待生效。"""
+    if _APPKIT_OK:
+        ok = [False]
+        _run_on_main_thread(lambda: ok.__setitem__(0, _pasteboard_write(text)))
+        if ok[0]:
+            return
     pyperclip.copy(text)
     time.sleep(0.1)
 
-    # 方案 A（主）：osascript activate 目標 App → keystroke Cmd+V
+
+def _post_cmd_v() -> bool:
+    """在 GCD 主執行緒以 CGEvent 送 Cmd+V 給前景 App（需輔助使用權限，與 osascript 相同）。
+
+    與 pynput 相同走主執行緒：macOS 26 對事件 / 輸入法 API 有主執行緒斷言，不賭背景執行緒安全。
+    """
+    if not _QUARTZ_OK:
+        return False
+    posted = [False]
+
+    def _post():
+        try:
+            for key_down in (True, False):
+                event = CGEventCreateKeyboardEvent(None, _KEYCODE_V, key_down)
+                CGEventSetFlags(event, kCGEventFlagMaskCommand)
+                CGEventPost(kCGHIDEventTap, event)
+            posted[0] = True
+        except Exception as e:
+            logger.debug("CGEvent 貼上失敗（%s）", e)
+
+    return _run_on_main_thread(_post) and posted[0]
+
+
+def paste_text(text: str, target_app: str = "") -> tuple[str, bool]:
+    _set_clipboard(text)
+
+    # 方案 A（主）：目標 App 仍在前景 → CGEvent 直送 Cmd+V，不啟動任何子行程
+    if (not target_app or get_frontmost_app() == target_app) and _post_cmd_v():
+        logger.debug("🪵 paste method: cgevent")
+        return "cgevent", True
+
+    # 方案 B：osascript activate 目標 App → keystroke Cmd+V
     if target_app:
         logger.debug("🪵 paste target app: %s", target_app)
         target_app_escaped = target_app.replace("\\", "\\\\").replace('"', '\\"')
         script = (
-            f'tell application "{target_app_escaped}" to activate\n'
+            f'tell application id "{target_app_escaped}" to activate\n'
             f'delay 0.12\n'
             f'tell application "System Events"\n'
             f'    keystroke "v" using command down\n'
@@ -130,7 +236,7 @@ def paste_text(text: str, target_app: str = "") -> tuple[str, bool]:
         logger.warning("   請確認：系統設定 → 隱私權與安全性 → 輔助使用")
         logger.warning("   啟動用的 App 需授權：Terminal / iTerm / PyCharm / VS Code")
 
-    # 方案 B（fallback）：pynput 直送 Cmd+V（GCD 主執行緒）
+    # 方案 C（fallback）：pynput 直送 Cmd+V（GCD 主執行緒）
     def _pynput_cmd_v():
         from pynput.keyboard import Controller, Key
         kb = Controller()
@@ -72,13 +72,51 @@ _SIMPLIFIED_CHAR_PATTERN = re.compile(
 )
 
 
-def apply_corrections(text: str, regex_rules: list[dict]) -> str:
+_RULE_FLAGS = {"IGNORECASE": re.IGNORECASE, "MULTILINE": re.MULTILINE, "DOTALL": re.DOTALL}
+
+# 純字面選擇式（如 "N8n|N 8 n"）：可先用 str 子字串搜尋判斷是否可能命中
+_LITERAL_ALTERNATION = re.compile(r"[A-Za-z0-9 |]+")
+
+
+def _literal_needles(pattern: str) -> tuple[str, ...] | None:
+    """純字面選擇式回傳 casefold 後的各字面；其他 pattern（或含空選項）回傳 None"""
+    if not _LITERAL_ALTERNATION.fullmatch(pattern):
+        return None
+    needles = tuple(s.casefold() for s in pattern.split("|"))
+    return None if "" in needles else needles
+
+
+def compile_rules(regex_rules: list[dict]) -> list[tuple[re.Pattern, str, tuple[str, ...] | None]]:
+    """載入時一次編譯 regex_rules 為 (Pattern, replacement, 字面)；無效規則記警告後略過，不中斷啟動。
+
+    字面不為 None 的規則，apply_corrections 會先以 `in` 檢查 casefold 後的文字，
+    一個字面都不在就跳過 regex 引擎（大小寫敏感規則也適用，只是寬鬆的預篩）。
+    """
+    compiled = []
     for rule in regex_rules:
+        flag_str = rule.get("flags", "").upper()
         flags = 0
-        flag_str = rule.get("flags", "")
-        if "IGNORECASE" in flag_str.upper():
-            flags |= re.IGNORECASE
-        text = re.sub(rule["pattern"], rule["replacement"], text, flags=flags)
+        for name, flag in _RULE_FLAGS.items():
+            if name in flag_str:
+                flags |= flag
+        try:
+            compiled.append((re.compile(rule["pattern"], flags), rule["replacement"],
+                             _literal_needles(rule["pattern"])))
+        except (re.error, KeyError) as e:
+            logger.warning("⚠️  略過無效 regex 規則 %r（%s）", rule, e)
+    return compiled
+
+
+def apply_corrections(text: str, compiled_rules: list[tuple[re.Pattern, str, tuple[str, ...] | None]]) -> str:
+    folded = None
+    for pattern, replacement, needles in compiled_rules:
+        if needles is not None:
+            if folded is None:
+                folded = text.casefold()
+            if not any(n in folded for n in needles):
+                continue
+        text = pattern.sub(replacement, text)
+        folded = None
     return text.strip()
 
 
@@ -1,61 +1,141 @@
 """STT + LLM provider 抽象與實作"""
 from __future__ import annotations
 
+import io
+import json
 import logging
 import os
+import threading
+import uuid
+from collections.abc import Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from _voice_config import Mode
 
 logger = logging.getLogger(__name__)
 
+# orjson 為選配：有裝就用（解析較快），沒有退回標準庫 json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# 共用 Session：保持 keep-alive，第二次起的 STT / LLM 呼叫免去 TCP + TLS 握手。
+# pool_connections=2 對應 STT 與 Cerebras 兩個 host，各保留最多 2 條連線。
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=2))
+
+
+def warm_connection(*targets: tuple[str | None, dict | None]):
+    """對各 (endpoint, headers) 送 HEAD 先建好 TLS 連線放進 pool；失敗僅 debug log，不影響啟動。
+
+    帶上 provider 的 Authorization（不帶 Content-Type），避免未授權請求被拒或觸發濫用偵測。
+    """
+    for url, headers in targets:
+        if not url:
+            continue
+        auth = {"Authorization": headers["Authorization"]} if headers and "Authorization" in headers else None
+        try:
+            _session.head(url, headers=auth, timeout=5)
+        except requests.RequestException as e:
+            logger.debug("連線預熱失敗 %s（%s）", url, e)
+
 
 # ---------------------------------------------------------------------------
 # STT providers
 # ---------------------------------------------------------------------------
 
+# upload_codec → (檔名, Content-Type)
+_CODEC_FILES = {
+    "wav":  ("voice.wav", "audio/wav"),
+    "flac": ("voice.flac", "audio/flac"),
+}
+
+
+def _multipart_prefix(boundary: str, fields: list[tuple[str, str]], codec: str) -> bytes:
+    """file 內容之前的 multipart 片段：各文字欄位 + file part header（file 放最後）"""
+    filename, content_type = _CODEC_FILES[codec]
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in fields
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    )
+    return "".join(parts).encode()
+
+
 class TranscribeProvider:
-    """Provider 介面。子類實作 transcribe(wav_path, mode) -> str"""
+    """Provider 介面。子類實作 form(mode) -> (url, 欄位) 與 parse(content) -> str；
+    transcribe(audio, mode, codec) 以 multipart 上傳記憶體內 WAV / FLAC（file 欄位放最後）。
+
+    請求形狀除了音訊外固定：headers 於建構時、各 mode 的 multipart 前綴於首次使用時
+    預先組好，之後每次呼叫只串接音訊 bytes。
+    """
     name = "base"
 
     def __init__(self, cfg: dict):
         self.cfg = cfg
+        boundary = uuid.uuid4().hex
+        self.headers = {
+            "Authorization": f"Bearer {cfg['api_key']}",
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+        }
+        self._boundary = boundary
+        self.multipart_suffix = f"\r\n--{boundary}--\r\n".encode()
+        self._templates: dict[tuple[str, str], tuple[str, bytes]] = {}
+
+    def form(self, mode: Mode) -> tuple[str, list[tuple[str, str]]]:
+        raise NotImplementedError
 
-    def transcribe(self, wav_path: str, mode: Mode) -> str:
+    def parse(self, content: bytes) -> str:
         raise NotImplementedError
 
+    def template(self, mode: Mode, codec: str = "wav") -> tuple[str, bytes]:
+        """回傳 (url, multipart 前綴)，依 (mode.id, codec) 快取"""
+        key = (mode.id, codec)
+        t = self._templates.get(key)
+        if t is None:
+            url, fields = self.form(mode)
+            t = self._templates[key] = (url, _multipart_prefix(self._boundary, fields, codec))
+        return t
+
+    def transcribe(self, audio: io.BytesIO, mode: Mode, codec: str = "wav") -> str:
+        url, prefix = self.template(mode, codec)
+        body = b"".join((prefix, audio.getbuffer(), self.multipart_suffix))
+        r = _session.post(url, headers=self.headers, data=body, timeout=30)
+        r.raise_for_status()
+        return self.parse(r.content)
+
 
 class OpenAIProvider(TranscribeProvider):
     name = "openai"
 
-    def transcribe(self, wav_path, mode):
+    def form(self, mode):
         url = self.cfg["endpoint"]
-        headers = {"Authorization": f"Bearer {self.cfg['api_key']}"}
-        with open(wav_path, "rb") as f:
-            files = {"file": ("voice.wav", f, "audio/wav")}
-            data = {
-                "model": self.cfg["model"],
-                "language": mode.language,
-                "temperature": str(self.cfg.get("temperature", 0.0)),
-                "response_format": "text",
-                "prompt": mode.prompt,
-            }
-            if mode.translate_to_english:
-                url = url.replace("/transcriptions", "/translations")
-                data.pop("language", None)
-            r = requests.post(url, headers=headers, files=files, data=data, timeout=30)
-        r.raise_for_status()
-        return r.text.strip()
-
-
-class GroqProvider(TranscribeProvider):
+        fields = [
+            ("model", self.cfg["model"]),
+            ("language", mode.language),
+            ("temperature", str(self.cfg.get("temperature", 0.0))),
+            ("response_format", "json"),
+            ("prompt", mode.prompt),
+        ]
+        if mode.translate_to_english:
+            url = url.replace("/transcriptions", "/translations")
+            fields = [f for f in fields if f[0] != "language"]
+        return url, fields
+
+    def parse(self, content):
+        return _json_loads(content)["text"].strip()
+
+
+class GroqProvider(OpenAIProvider):
     """Groq API 與 OpenAI 格式相容"""
     name = "groq"
 
-    def transcribe(self, wav_path, mode):
-        return OpenAIProvider.transcribe(self, wav_path, mode)
-
 
 class GrokProvider(TranscribeProvider):
     """xAI Grok STT — https://api.x.ai/v1/stt
@@ -64,28 +144,82 @@ class GrokProvider(TranscribeProvider):
     """
     name = "grok"
 
-    def transcribe(self, wav_path, mode):
-        url = self.cfg["endpoint"]
-        headers = {"Authorization": f"Bearer {self.cfg['api_key']}"}
+    def form(self, mode):
         lang = "en" if mode.translate_to_english else mode.language
         keyterms = mode.grok_keyterms[:10]
         fields = [("language", lang)]
         for kt in keyterms:
             if len(kt) <= 50:
                 fields.append(("keyterm", kt))
-        with open(wav_path, "rb") as f:
-            files = {"file": ("voice.wav", f, "audio/wav")}
-            r = requests.post(
-                url, headers=headers,
-                data=fields,
-                files=files,
-                timeout=30,
-            )
-        r.raise_for_status()
+        return self.cfg["endpoint"], fields
+
+    def parse(self, content):
         try:
-            return r.json().get("text", "").strip()
+            return _json_loads(content).get("text", "").strip()
         except ValueError:
-            return r.text.strip()
+            return content.decode("utf-8", errors="replace").strip()
+
+
+class _UploadCancelled(Exception):
+    pass
+
+
+class StreamingUpload:
+    """按下熱鍵即開始上傳：以 chunked transfer 邊錄邊送 multipart body。
+
+    multipart 前綴與 transcribe() 共用（provider.template()），file 內容取自 recorder.stream_wav()
+    （長度未知的 WAV），錄音停止後送出結尾 boundary，上傳時間因此藏在錄音時間內。
+    錄音太短時須在 recorder.stop() 之前 cancel()：結尾 boundary 不會送出，請求不會完成。
+    """
+
+    def __init__(self, provider: TranscribeProvider, mode: Mode, wav_chunks: Iterator[bytes]):
+        self.provider = provider
+        self.mode = mode
+        self._chunks = wav_chunks
+        self._cancelled = threading.Event()
+        self._read_lock = threading.Lock()  # 自錄音緩衝取資料期間持有；cancel() 取得後即保證不再讀取
+        self._text: str | None = None
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _body(self, prefix: bytes):
+        yield prefix
+        while True:
+            with self._read_lock:
+                if self._cancelled.is_set():
+                    raise _UploadCancelled()
+                chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        if self._cancelled.is_set():  # 不送結尾 boundary，伺服器不會把殘缺的 body 當成完整請求
+            raise _UploadCancelled()
+        yield self.provider.multipart_suffix
+
+    def _run(self):
+        url, prefix = self.provider.template(self.mode)
+        try:
+            r = _session.post(url, headers=self.provider.headers, data=self._body(prefix), timeout=30)
+            r.raise_for_status()
+            self._text = self.provider.parse(r.content)
+        except Exception as e:
+            self._error = e
+
+    def finish(self) -> str:
+        """等待上傳完成並回傳辨識結果（錯誤原樣拋出，供呼叫端沿用 HTTPError / Timeout 處理）"""
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._text or ""
+
+    def cancel(self, timeout: float = 2.0):
+        """中斷上傳；返回後不會再讀取錄音緩衝，可立即開始下一段錄音。上傳執行緒最多等 timeout 秒收尾。"""
+        with self._read_lock:
+            self._cancelled.set()
+        self._thread.join(timeout)
 
 
 def build_provider(api_cfg: dict) -> TranscribeProvider:
@@ -122,35 +256,38 @@ class CerebrasProvider(LLMCorrectionProvider):
 
     def __init__(self, cfg: dict):
         self.cfg = cfg
+        # 固定參數建構時綁成屬性，correct() 不再每次查 dict / 組 headers
+        self.endpoint = cfg.get("endpoint", "https://api.cerebras.ai/v1/chat/completions")
+        self.model = cfg.get("model", "llama3.3-70b")
+        self.max_tokens = cfg.get("max_tokens", 512)
+        self.headers = {
+            "Authorization": f"Bearer {cfg['api_key']}",
+            "Content-Type": "application/json",
+        }
 
     def correct(self, text: str, mode: Mode) -> str:
         self.last_finish_reason: str | None = None
         if not mode.llm_prompt or not text:
             return text
         try:
-            url = self.cfg.get("endpoint", "https://api.cerebras.ai/v1/chat/completions")
-            headers = {
-                "Authorization": f"Bearer {self.cfg['api_key']}",
-                "Content-Type": "application/json",
-            }
             data = {
-                "model": self.cfg.get("model", "llama3.3-70b"),
+                "model": self.model,
                 "messages": [
                     {"role": "system", "content": mode.llm_prompt},
                     {"role": "user",   "content": text},
                 ],
-                "max_tokens": self.cfg.get("max_tokens", 512),
+                "max_tokens": self.max_tokens,
                 "temperature": 0.0,
             }
-            r = requests.post(url, headers=headers, json=data, timeout=15)
+            r = _session.post(self.endpoint, headers=self.headers, json=data, timeout=15)
             r.raise_for_status()
-            res = r.json()
+            res = _json_loads(r.content)
             choice = res["choices"][0]
             self.last_finish_reason = choice.get("finish_reason")
             if self.last_finish_reason == "length":
                 logger.warning(
                     "⚠️  Cerebras 輸出被截斷（finish_reason=length，max_tokens=%s）",
-                    self.cfg.get("max_tokens", 512),
+                    self.max_tokens,
                 )
             return choice["message"]["content"].strip()
         except Exception as e:
@@ -34,18 +34,25 @@ import os
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
+from pynput import keyboard
 
 from _voice_audio import AudioRecorder
 from _voice_config import ModeManager, get_base_dir, load_config
 from _voice_hud import HUD, _probe_tkinter
 from _voice_instance import ensure_single_instance, remove_pid_file, write_pid_file
 from _voice_menubar import build_menubar_app, set_menubar_state
-from _voice_paste import beep, get_frontmost_app, paste_text
+from _voice_paste import beep, get_frontmost_app, paste_text, preload_beep
 from _voice_postprocess import apply_corrections, normalize_traditional_text
-from _voice_providers import build_llm_correction_provider, build_provider
+from _voice_providers import (
+    StreamingUpload,
+    build_llm_correction_provider,
+    build_provider,
+    warm_connection,
+)
 from _voice_session import SessionLogger, _now
 from _voice_vocab import load_vocab_store
 
@@ -70,6 +77,33 @@ logging.basicConfig(level=logging.DEBUG, handlers=[_file_handler, _console_handl
 logger = logging.getLogger(__name__)
 
 
+# ---------------------------------------------------------------------------
+# 熱鍵常數（import 時算一次）
+# ---------------------------------------------------------------------------
+
+_HOTKEY_MAP = {
+    f"f{i}": getattr(keyboard.Key, f"f{i}")
+    for i in range(1, 21) if hasattr(keyboard.Key, f"f{i}")
+}
+
+_MODIFIER_KEYS = {
+    "ctrl":  (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r, keyboard.Key.ctrl),
+    "shift": (keyboard.Key.shift_l, keyboard.Key.shift_r, keyboard.Key.shift),
+    "alt":   (keyboard.Key.alt_l, keyboard.Key.alt_r, keyboard.Key.alt),
+}
+
+
+def _vk(key):
+    # Key 列舉的 vk 在 .value（KeyCode）上；一般 KeyCode 直接帶 vk
+    return getattr(getattr(key, "value", key), "vk", None)
+
+
+# 熱鍵比對用整數 vk：listener 收到全系統每個按鍵，查 dict / 比整數即可略過無關鍵
+_MOD_BY_VK = {
+    _vk(k): name for name, keys in _MODIFIER_KEYS.items() for k in keys if _vk(k) is not None
+}
+
+
 # ---------------------------------------------------------------------------
 # 主程式
 # ---------------------------------------------------------------------------
@@ -91,6 +125,18 @@ def main():
         logger.error("❌ Provider 初始化失敗：%s", e)
         sys.exit(1)
 
+    preload_beep()  # 啟動時先載入提示音，第一次錄音不必等
+
+    # 背景預熱 HTTPS 連線，第一次辨識就不必付 TLS 握手
+    threading.Thread(
+        target=warm_connection,
+        args=(
+            (provider.cfg.get("endpoint"), provider.headers),
+            (getattr(llm_correction, "endpoint", None), getattr(llm_correction, "headers", None)),
+        ),
+        daemon=True,
+    ).start()
+
     session_logger = SessionLogger()
 
     # ── 2b. 載入使用者自訂詞彙（第三層後處理）──
@@ -126,38 +172,54 @@ def main():
             logger.warning("⚠️  HUD 已停用：tkinter 無法初始化（Tk 版本與 macOS 不相容）")
             logger.warning("   修復方式：brew install python-tk@3.14")
 
+    state_lock = threading.Lock()  # set_state 由 worker 執行緒呼叫，避免選單列 / HUD 狀態交錯
+
     def set_state(s: str):
-        set_menubar_state(s)
-        if hud:
-            hud.set_state(s)
+        with state_lock:
+            set_menubar_state(s)
+            if hud:
+                hud.set_state(s)
 
     # ── 5. 初始化錄音 ──
     recorder = AudioRecorder(
         sample_rate=config["recording"]["sample_rate"],
         channels=config["recording"]["channels"],
         input_device=config["recording"].get("input_device"),
+        upload_codec=config["recording"].get("upload_codec", "wav"),
+        trim_silence_peak=config["recording"].get("trim_silence_peak", 500),
     )
-    recording_flag = False
-    processing_flag = False  # True = 辨識進行中，擋住新錄音避免 race condition
-    lock = threading.Lock()
+    # 狀態旗標改用 Event：只有 listener 執行緒會 set recording / processing，
+    # worker 只負責 clear processing，熱鍵路徑不必再取 mutex
+    recording = threading.Event()
+    processing = threading.Event()  # set = 辨識進行中，擋住新錄音避免 race condition
+    # api.stream_upload：錄音一開始就邊錄邊上傳（StreamingUpload），停止時只等回應
+    stream_upload = config["api"].get("stream_upload", False)
+    upload: StreamingUpload | None = None
+    upload_lock = threading.Lock()  # 開始 / 結束 worker 交接 upload 用
+    # 開始 / 結束錄音交給常駐 worker，listener 執行緒只做旗標判斷即返回；
+    # 2 個 worker：結束錄音不必等開始錄音的提示音等待結束
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voice")
+
+    def _submit(fn, *args):
+        # executor 會吞掉例外，改由 callback 記錄，行為比照原本 thread 的 traceback
+        def _log_exc(fut):
+            if fut.exception():
+                logger.error("❌ 背景工作失敗：%s", fut.exception(), exc_info=fut.exception())
+        executor.submit(fn, *args).add_done_callback(_log_exc)
 
     # ── 6. 熱鍵偵測 ──
-    from pynput import keyboard
-
-    hotkey_map = {
-        f"f{i}": getattr(keyboard.Key, f"f{i}")
-        for i in range(1, 21) if hasattr(keyboard.Key, f"f{i}")
-    }
-    record_key      = hotkey_map.get(config["hotkey"]["record_key"].lower(), keyboard.Key.f1)
-    cycle_key       = hotkey_map.get(config["hotkey"]["mode_cycle_key"].lower(), keyboard.Key.f10)
-    record_modifier = config["hotkey"].get("record_modifier", "").lower()
-    cycle_modifier  = config["hotkey"].get("mode_cycle_modifier", "ctrl").lower()
+    hotkey_cfg      = config["hotkey"]
+    record_name     = hotkey_cfg["record_key"].lower()
+    cycle_name      = hotkey_cfg["mode_cycle_key"].lower()
+    record_key      = _HOTKEY_MAP.get(record_name, keyboard.Key.f1)
+    cycle_key       = _HOTKEY_MAP.get(cycle_name, keyboard.Key.f10)
+    record_modifier = hotkey_cfg.get("record_modifier", "").lower()
+    cycle_modifier  = hotkey_cfg.get("mode_cycle_modifier", "ctrl").lower()
 
     _mod_display       = f"{record_modifier.upper()}+" if record_modifier else ""
-    _key_display       = config["hotkey"]["record_key"].upper()
-    hotkey_display     = f"{_mod_display}{_key_display}"
+    hotkey_display     = f"{_mod_display}{record_name.upper()}"
     _cycle_mod_display = f"{cycle_modifier.upper()}+" if cycle_modifier else ""
-    cycle_hotkey_display = f"{_cycle_mod_display}{config['hotkey']['mode_cycle_key'].upper()}"
+    cycle_hotkey_display = f"{_cycle_mod_display}{cycle_name.upper()}"
 
     logger.info("=" * 50)
     logger.info("🎤 Whisper 語音轉文字工具已啟動（macOS）")
@@ -165,20 +227,16 @@ def main():
     logger.info("   切換模式：%s 或點 HUD", cycle_hotkey_display)
     logger.info("   Provider：%s", provider.name)
     if llm_correction:
-        llm_model = config["api"].get("llm_correction", {}).get(llm_correction.name, {}).get("model", "unknown")
-        logger.info("   LLM 修正：%s（%s）", llm_correction.name, llm_model)
+        logger.info("   LLM 修正：%s（%s）", llm_correction.name, getattr(llm_correction, "model", "unknown"))
     else:
         logger.info("   LLM 修正：停用")
     logger.info("   目前模式：%s", mode_manager.current.display)
     logger.info("   結束：選單列 ❌ 結束程式 或 Ctrl+C")
     logger.info("=" * 50)
 
-    _MODIFIER_KEYS = {
-        "ctrl":  (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r, keyboard.Key.ctrl),
-        "shift": (keyboard.Key.shift_l, keyboard.Key.shift_r, keyboard.Key.shift),
-        "alt":   (keyboard.Key.alt_l, keyboard.Key.alt_r, keyboard.Key.alt),
-    }
     _pressed_mods: set[str] = set()
+    record_vk = _vk(record_key)
+    cycle_vk = _vk(cycle_key)
 
     def _modifier_ok() -> bool:
         return not record_modifier or record_modifier in _pressed_mods
@@ -187,33 +245,44 @@ def main():
         return not cycle_modifier or cycle_modifier in _pressed_mods
 
     def _do_start_recording():
+        nonlocal upload
         if vocab_store:
             vocab_store.maybe_reload()  # 熱重載：改檔不必重啟
         set_state("recording")
         logger.info("🔴 錄音中... [模式：%s]（再按 %s 停止）", mode_manager.current.display, hotkey_display)
         recorder.start()
-        for _ in range(60):
-            time.sleep(0.05)
-            if recorder.buffer_samples > 4000:
-                beep()
-                break
+        if stream_upload:
+            with upload_lock:
+                if recording.is_set():  # 已按停止就不再開始上傳
+                    upload = StreamingUpload(provider, mode_manager.current, recorder.stream_wav())
+                    upload.start()
+        if recorder.wait_first_frame(timeout=3.0):
+            beep()
 
     def _do_process_recording(target_app: str = ""):
-        nonlocal processing_flag
-        wav_path, audio_sec = recorder.stop()
+        nonlocal upload
+        with upload_lock:
+            pending, upload = upload, None
+        # 長度在 stop() 前判定（串流上傳須在 stream_wav() 收尾前 cancel），之後一律以此為準
+        too_short = recorder.buffer_samples < recorder.MIN_SECONDS * recorder.sample_rate
+        if pending and too_short:
+            pending.cancel()  # 須在 stop() 讓 stream_wav() 收尾之前，否則結尾 boundary 會送出、請求照常完成
+        # 串流上傳已送出音訊，stop() 不必再裁切 / 編碼一次
+        audio_buf, audio_sec = recorder.stop(encode=pending is None and not too_short)
         try:
-            if not wav_path:
+            if too_short:
                 set_state("idle")
                 logger.warning("⚠️  錄音時間太短，已忽略")
                 return
 
             set_state("processing")
-            mode = mode_manager.current
+            mode = pending.mode if pending else mode_manager.current
             logger.info("🔄 辨識中... [%s]", mode.display)
 
             t0 = time.time()
             try:
-                raw_text = provider.transcribe(wav_path, mode)
+                raw_text = (pending.finish() if pending
+                            else provider.transcribe(audio_buf, mode, recorder.upload_codec))
             except requests.HTTPError as e:
                 status = e.response.status_code if e.response else "?"
                 msg = {401: "API Key 無效", 403: "API Key 權限不足", 429: "請求過於頻繁"}.get(
@@ -256,7 +325,7 @@ def main():
             stt_ms = int((t_stt - t0) * 1000)
             logger.debug("🪵 raw STT: %s", raw_text)
 
-            corrected_text = apply_corrections(raw_text, mode.regex_rules)
+            corrected_text = apply_corrections(raw_text, mode.compiled_rules)
             if not corrected_text:
                 logger.warning("⚠️  辨識結果為空")
                 set_state("idle")
@@ -309,48 +378,39 @@ def main():
                 llm_finish_reason=llm_finish_reason,
             )
         finally:
-            if wav_path:
-                try:
-                    os.unlink(wav_path)
-                except OSError:
-                    pass
-            with lock:
-                processing_flag = False
+            processing.clear()
 
     def on_press(key):
-        nonlocal recording_flag, processing_flag
-
-        for mod_name, mod_keys in _MODIFIER_KEYS.items():
-            if key in mod_keys:
-                _pressed_mods.add(mod_name)
-                return
+        vk = _vk(key)
+        mod_name = _MOD_BY_VK.get(vk)
+        if mod_name:
+            _pressed_mods.add(mod_name)
+            return
 
-        if key == cycle_key and _cycle_modifier_ok():
+        if vk == cycle_vk and _cycle_modifier_ok():
             mode_manager.cycle()
             logger.info("🔀 模式 → %s", mode_manager.current.display)
             return
 
-        if key != record_key or not _modifier_ok():
+        if vk != record_vk or not _modifier_ok():
             return
 
-        with lock:
-            if not recording_flag:
-                if processing_flag:
-                    logger.warning("⚠️  辨識進行中，請稍後再錄音")
-                    return
-                recording_flag = True
-                threading.Thread(target=_do_start_recording, daemon=True).start()
-            else:
-                recording_flag = False
-                processing_flag = True
-                target_app = get_frontmost_app()
-                threading.Thread(target=_do_process_recording, args=(target_app,), daemon=True).start()
+        if not recording.is_set():
+            if processing.is_set():
+                logger.warning("⚠️  辨識進行中，請稍後再錄音")
+                return
+            recording.set()
+            _submit(_do_start_recording)
+        else:
+            recording.clear()
+            processing.set()
+            target_app = get_frontmost_app()
+            _submit(_do_process_recording, target_app)
 
     def on_release(key):
-        for mod_name, mod_keys in _MODIFIER_KEYS.items():
-            if key in mod_keys:
-                _pressed_mods.discard(mod_name)
-                return
+        mod_name = _MOD_BY_VK.get(_vk(key))
+        if mod_name:
+            _pressed_mods.discard(mod_name)
 
     listener = keyboard.Listener(on_press=on_press, on_release=on_release)
     listener.start()
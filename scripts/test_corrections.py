@@ -0,0 +1,73 @@
+"""驗證 approach-3 compile_rules() 合併規則後與依序套用結果一致。
+
+案例：
+  [cat→dog（不分大小寫）, dog→cow]  "CAT dog" → "cow cow"（後者看得到前者輸出，不可合併）
+  [b→Y, ab→X]                       "ab"      → "aY"     （字面重疊，不可合併）
+  [N8n|N 8 n→n8n, Zendsk→Zendesk]  互不影響，可合併為一次掃描
+
+只匯入 _postprocess（純標準函式庫），不需 GUI / 音訊套件；失敗時 AssertionError、非 0 結束。
+執行：python scripts/test_corrections.py（或 python -m pytest scripts/test_corrections.py）
+"""
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+
+# 讓 import 找得到 approach-3 的 _postprocess.py
+APP_DIR = Path(__file__).resolve().parent.parent / "approach-3-python-exe"
+sys.path.insert(0, str(APP_DIR))
+
+from _postprocess import apply_corrections, compile_rules, make_corrector  # noqa: E402
+
+CASES = [
+    # (規則, 輸入, 期望輸出, 說明)
+    ([{"pattern": "cat", "replacement": "dog", "flags": "IGNORECASE"},
+      {"pattern": "dog", "replacement": "cow"}],
+     "CAT dog", "cow cow", "鏈式規則：後者命中前者的替換結果"),
+    ([{"pattern": "b", "replacement": "Y"},
+      {"pattern": "ab", "replacement": "X"}],
+     "ab", "aY", "字面重疊：依 config 順序套用"),
+    ([{"pattern": "N8n|N 8 n", "replacement": "n8n", "flags": "IGNORECASE"},
+      {"pattern": "Zendsk", "replacement": "Zendesk"}],
+     "用 N 8 N 串 Zendsk", "用 n8n 串 Zendesk", "互不影響的規則可合併"),
+    ([{"pattern": "x", "replacement": ""},
+      {"pattern": "ab", "replacement": "Z"}],
+     "axb", "Z", "刪除後兩側接成新命中"),
+    ([{"pattern": "x", "replacement": "a"},
+      {"pattern": "ab", "replacement": "Z"}],
+     "xb", "Z", "替換結果與後文接成新命中"),
+]
+
+
+def _sequential(text: str, rules: list[dict]) -> str:
+    """基準：逐條 re.sub（合併前的行為）"""
+    for rule in rules:
+        flags = re.IGNORECASE if "IGNORECASE" in rule.get("flags", "").upper() else 0
+        text = re.sub(rule["pattern"], rule["replacement"], text, flags=flags)
+    return text.strip()
+
+
+def test_matches_sequential():
+    for rules, src, expect, desc in CASES:
+        compiled = compile_rules(rules)
+        ref = _sequential(src, rules)
+        assert ref == expect, f"{desc}：基準 {ref!r} != 期望 {expect!r}"
+        out = apply_corrections(src, compiled)
+        assert out == expect, f"{desc}：apply_corrections {out!r} != {expect!r}"
+        out = make_corrector(compiled)(src)
+        assert out == expect, f"{desc}：make_corrector {out!r} != {expect!r}"
+        print(f"✅ {src!r} → {out!r}  [{desc}]")
+
+
+def test_independent_rules_fused():
+    rules = CASES[2][0]
+    fused = compile_rules(rules)
+    assert len(fused) == 1, f"互不影響的 {len(rules)} 條規則應合併為 1 條，實得 {len(fused)}"
+    print(f"✅ 互不影響的 {len(rules)} 條規則合併為 1 條")
+
+
+if __name__ == "__main__":
+    test_matches_sequential()
+    test_independent_rules_fused()
+    print("✅ 全部通過")
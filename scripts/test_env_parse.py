@@ -0,0 +1,37 @@
+"""驗證 approach-3 parse_env()：空值不吞下一行、註解 / export / 引號 / CRLF。
+
+只匯入 _env（純標準函式庫），不需 GUI / 音訊套件；失敗時 AssertionError、非 0 結束。
+執行：python scripts/test_env_parse.py（或 python -m pytest scripts/test_env_parse.py）
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# 讓 import 找得到 approach-3 的 _env.py
+APP_DIR = Path(__file__).resolve().parent.parent / "approach-3-python-exe"
+sys.path.insert(0, str(APP_DIR))
+
+from _env import parse_env  # noqa: E402
+
+CASES = [
+    # (env 內容, 期望結果, 說明)
+    ("OPENAI_API_KEY=\nOTHER=x\n", {"OPENAI_API_KEY": "", "OTHER": "x"}, "空值不吞下一行"),
+    ("KEY =   \n\nNEXT=1", {"KEY": "", "NEXT": "1"}, "空值後接空行"),
+    ("# OPENAI_API_KEY=old\nOPENAI_API_KEY=sk-1\n", {"OPENAI_API_KEY": "sk-1"}, "忽略註解行"),
+    ("export A='x y'\nB=\"z\"\n", {"A": "x y", "B": "z"}, "export 與成對引號"),
+    ("A=1\r\nB=2\r\n", {"A": "1", "B": "2"}, "CRLF 換行"),
+    ("  A = a=b  \n", {"A": "a=b"}, "值內含 = 與前後空白"),
+]
+
+
+def test_parse_env():
+    for text, expect, desc in CASES:
+        out = parse_env(text)
+        assert out == expect, f"{desc}：{out!r} != {expect!r}"
+        print(f"✅ {text!r} → {out!r}  [{desc}]")
+
+
+if __name__ == "__main__":
+    test_parse_env()
+    print("✅ 全部通過")